@@ -1,21 +1,32 @@
-from dash import Dash, dcc, html, Input, Output
+import logging
+import os
+from functools import partial
+from dash import Dash, dcc, html
 from src import graphics, etl
+from src.lazy import once
+from src.memory import AllocationTracker
+from src.rendering import build_figures
 import dash_bootstrap_components as dbc
-import pickle
-import plotly.io as pio
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from callbacks.industry_callbacks import register_industry_callbacks, register_lead_time_callbacks, register_deposit_type_callbacks
+from callbacks.industry_callbacks import register_industry_callbacks, register_lead_time_callbacks, register_deposit_type_callbacks, register_export_callbacks, register_segment_callbacks, register_distribution_callbacks, single_flight
 from callbacks.prediction_callbacks import register_prediction_callbacks
 from callbacks.tabs_callback import register_tabs_callback
-from layouts.industry_info import industry_info_layout
+from routes.drift_routes import register_drift_routes
+from routes.export_routes import register_export_routes
+from routes.memory_routes import register_memory_routes
 from layouts.predict_cancellation import predict_cancellation_layout
 
+# Setting a token enables the /admin/memory report. Tracing starts before the
+# data is loaded so those allocations are attributed too.
+MEMORY_PROFILE_TOKEN = os.environ.get("MEMORY_PROFILE_TOKEN")
+if MEMORY_PROFILE_TOKEN:
+    AllocationTracker.start()
 
 df = etl.load_data()
+source_columns = df.columns.drop("arrival_month").tolist()
+reservation_pyramid = etl.build_reservation_pyramid(df)
+segment_tables = etl.build_segment_tables(df)
+distribution_sketches = etl.build_distribution_sketches(df)
 
 unique_months = sorted(df["arrival_month"].unique())
 reverse_month_mapping = {i: month for i, month in enumerate(unique_months)}
@@ -23,15 +34,43 @@ slider_marks = {
     i: month.strftime("%Y-%m") for i, month in enumerate(unique_months) if i % 6 == 0
 }
 
-feature_importances, model_data, form_model_data = etl.load_model_data() 
+# Window during which concurrent prediction requests are collected into one batch.
+PREDICTION_BATCH_WINDOW_MS = float(os.environ.get("PREDICTION_BATCH_WINDOW_MS", 5))
+PREDICTION_MAX_BATCH_SIZE = int(os.environ.get("PREDICTION_MAX_BATCH_SIZE", 256))
+# A stuck batcher turns into an error message instead of holding a server thread.
+PREDICTION_TIMEOUT_SECONDS = float(os.environ.get("PREDICTION_TIMEOUT_SECONDS", 10))
 
-#We get our model, metrics and form_model from here
-model = model_data["model"]
-metrics = model_data["metrics"]
-form_model = form_model_data["model"]
-feature_names = form_model_data["feature_names"]
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
+
+# Static figures are built once at startup; build times are logged per figure.
+static_figures, _ = build_figures(
+    {
+        "year_reservations_cancellation": partial(graphics.year_reservations_cancellation, df),
+        "lead_time_cancellation_scatter": partial(graphics.lead_time_cancellation_scatter, df),
+        "lead_time_cancellation_heatmap": partial(graphics.lead_time_cancellation_heatmap, df),
+    },
+    label="startup figures",
+)
+
+
+@once
+def build_prediction_tab():
+    # Models are unpickled here, the first time someone opens the prediction tab.
+    feature_importances = etl.load_feature_importances()
+    model_data = etl.load_full_model_data()
+    evaluation = model_data.get("evaluation")
+
+    builders = {"feature_importances": partial(graphics.plot_feature_importances, feature_importances)}
+    if evaluation:
+        builders["roc_pr_curves"] = partial(graphics.plot_roc_pr_curves, evaluation)
+        builders["calibration"] = partial(graphics.plot_calibration, evaluation)
+    figures, _ = build_figures(builders, label="prediction tab figures")
+
+    return predict_cancellation_layout(model_data["metrics"], evaluation, figures)
 
-app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY])
+
+# The prediction tab components are created lazily, after the callbacks are registered.
+app = Dash(__name__, external_stylesheets=[dbc.themes.FLATLY], suppress_callback_exceptions=True)
 
 server = app.server
 
@@ -112,6 +151,19 @@ app.layout = html.Div(
                                     marks=slider_marks,
                                     tooltip={"placement": "bottom", "always_visible": True},
                                 ),
+                                dcc.RadioItems(
+                                    id="evolution-resolution",
+                                    options=[
+                                        {"label": "Auto", "value": "auto"},
+                                        {"label": "Daily", "value": "D"},
+                                        {"label": "Weekly", "value": "W"},
+                                        {"label": "Monthly", "value": "M"},
+                                    ],
+                                    value="auto",
+                                    inline=True,
+                                    style={"marginTop": "20px", "textAlign": "center"},
+                                    inputStyle={"marginRight": "5px", "marginLeft": "10px"}
+                                ),
                             ],
                         ),
                     ],
@@ -130,7 +182,7 @@ app.layout = html.Div(
                             ),
                             dcc.Graph(
                                 id = "year-reservations-cancellation",
-                                figure = graphics.year_reservations_cancellation(df),
+                                figure = static_figures["year_reservations_cancellation"],
                                 style={"width": "55%"}
                             ),
                         ],
@@ -189,12 +241,12 @@ app.layout = html.Div(
                             children = [
                                 dcc.Graph(
                                     id="lead-time-cancellation-scatter",
-                                    figure=graphics.lead_time_cancellation_scatter(df), 
+                                    figure=static_figures["lead_time_cancellation_scatter"],
                                     style={"width": "55%"}
                             ),
                                 dcc.Graph(
                                     id = "lead-time-cancellation-heatmap",
-                                    figure = graphics.lead_time_cancellation_heatmap(df),
+                                    figure = static_figures["lead_time_cancellation_heatmap"],
                                     style={"width": "45%"}
                                 ),
                             ],
@@ -267,111 +319,175 @@ app.layout = html.Div(
                                 ),
                             ],
                         ),
+                        html.Div(
+                            style={"textAlign": "center", "padding": "10px"},
+                            children=[
+                                html.P(
+                                    "Download the data for the selected date range and hotel type:",
+                                    style={"color": "#333"},
+                                ),
+                                html.A("Bookings (CSV)", id="export-rows-csv", style={"margin": "0 10px"}),
+                                html.A("Bookings (Parquet)", id="export-rows-parquet", style={"margin": "0 10px"}),
+                                html.A("Monthly Reservations (CSV)", id="export-reservations-csv", style={"margin": "0 10px"}),
+                                html.A("Deposit Types (CSV)", id="export-deposit-types-csv", style={"margin": "0 10px"}),
+                            ],
+                        ),
                     ],
                 ),
-            ],
-        ),
-        # Predict Your Cancellation Content
-        html.Div(
-            id="predict-cancellation-content",
-            style={"display": "none"},
-            children=[
-                html.H3(
-                    "Cancellation Predictor - Overview",
-                    style={"textAlign": "center", "marginBottom": "20px", "color": "#333", "marginTop": "20px"},
+                html.Hr(
+                    style={
+                        "border": "1px solid gray",
+                        "width": "95%",
+                        "margin": "20px auto",
+                    }
                 ),
                 html.Div(
-                    style = {
+                    style={
                         "padding": "20px",
                     },
-                    children = [
-                        graphics.create_metrics_table(metrics), 
-                        dcc.Graph(
-                            id="feature-importance-graph",
-                            figure=graphics.plot_feature_importances(feature_importances)),
-                    ],
-                ),
-                html.Div(
-                    children = [
-                        html.H3("Predict Cancellation", style={"textAlign": "center"}),
-
-                        # Input form
+                    children=[
+                        html.H3(
+                            "Customer Segments",
+                            style={"textAlign": "center", "marginBottom": "20px", "color": "#333"},
+                        ),
+                        html.P(
+                            "Which segments cancel the most? Uses the date range and hotel type selected above; click a bar to see its monthly trend.",
+                            style={"textAlign": "center", "marginBottom": "20px", "color": "#333"},
+                        ),
                         html.Div(
-                            style={"width": "50%", "margin": "0 auto", "padding": "20px"},
+                            style={"display": "flex", "justifyContent": "center", "alignItems": "center", "gap": "20px"},
                             children=[
-                                dbc.Row(
-                                    [
-                                        dbc.Col(dbc.Label("Requested Parking Spaces"), width=4),
-                                        dbc.Col(dbc.Input(id="input-parking", type="number", value=0), width=8),
+                                dcc.Dropdown(
+                                    id="segment-dimension",
+                                    options=[
+                                        {"label": label, "value": column}
+                                        for column, label in etl.SEGMENT_COLUMNS.items()
                                     ],
-                                    className="mb-3",
+                                    value="country",
+                                    clearable=False,
+                                    style={"width": "250px"},
                                 ),
-                                dbc.Row(
-                                    [
-                                        dbc.Col(dbc.Label("Customer's Previous Cancellations"), width=4),
-                                        dbc.Col(dbc.Input(id="input-previous-cancellations", type="number", value=0), width=8),
-                                    ],
-                                    className="mb-3",
+                                dcc.RadioItems(
+                                    id="segment-top-n",
+                                    options=[{"label": f"Top {n}", "value": n} for n in (5, 10, 20)],
+                                    value=10,
+                                    inline=True,
+                                    inputStyle={"marginRight": "5px", "marginLeft": "10px"}
                                 ),
-                                dbc.Row(
-                                    [
-                                        dbc.Col(dbc.Label("Deposit Type"), width=4),
-                                        dbc.Col(
-                                            dcc.Dropdown(
-                                                id="input-deposit-type",
-                                                options=[
-                                                    {"label": "No Deposit", "value": "deposit_type_No Deposit"},
-                                                    {"label": "Non Refund", "value": "deposit_type_Non Refund"},
-                                                    {"label": "Refundable", "value": "deposit_type_Refundable"},
-                                                ],
-                                                value="deposit_type_No Deposit", 
-                                            ),
-                                            width=8,
-                                        ),
-                                    ],
-                                    className="mb-3",
+                            ],
+                        ),
+                        html.Div(
+                            style={
+                                "display": "flex",
+                                "justifyContent": "space-between",
+                                "padding": "20px",
+                            },
+                            children=[
+                                dcc.Graph(
+                                    id="segment-ranking",
+                                    style={"width": "45%"}
                                 ),
-                                dbc.Row(
-                                    [
-                                        dbc.Col(dbc.Label("Average Daily Rate (ADR)"), width=4),
-                                        dbc.Col(dbc.Input(id="input-adr", type="number", value=15), width=8),
-                                    ],
-                                    className="mb-3",
+                                dcc.Graph(
+                                    id="segment-trend",
+                                    style={"width": "55%"}
                                 ),
-                                html.Br(),
-                                    dbc.Row(
-                                        dbc.Col(
-                                            dbc.Button(
-                                                "Predict Cancellation", 
-                                                id="predict-button", 
-                                                color="primary",
-                                                style={"width": "100%"} 
-                                            ),
-                                            width=12,
-                                        ),
-                                        className="mb-3",
-                                    ),
                             ],
                         ),
-
-                        # Output section
-                        html.Div(
-                            id="prediction-output",
-                            style={"textAlign": "center", "padding": "20px", "fontSize": "20px"},
+                    ],
+                ),
+                html.Hr(
+                    style={
+                        "border": "1px solid gray",
+                        "width": "95%",
+                        "margin": "20px auto",
+                    }
+                ),
+                html.Div(
+                    style={
+                        "padding": "20px",
+                    },
+                    children=[
+                        html.H3(
+                            "Price and Lead Time Distribution",
+                            style={"textAlign": "center", "marginBottom": "20px", "color": "#333"},
+                        ),
+                        html.P(
+                            "Median and 10th to 90th percentile range per month, for the date range and hotel type selected above.",
+                            style={"textAlign": "center", "marginBottom": "20px", "color": "#333"},
+                        ),
+                        dcc.RadioItems(
+                            id="distribution-metric",
+                            options=[
+                                {"label": label, "value": column}
+                                for column, label in etl.DISTRIBUTION_COLUMNS.items()
+                            ],
+                            value="adr",
+                            inline=True,
+                            style={"marginBottom": "20px", "textAlign": "center", "padding": "10px"},
+                            inputStyle={"marginRight": "10px", "marginLeft": "10px"}
+                        ),
+                        dcc.Graph(
+                            id="distribution-bands",
+                            style={"height": "500px", "width": "100%"}
                         ),
                     ],
                 ),
             ],
         ),
+        # Predict Your Cancellation Content
+        html.Div(
+            id="predict-cancellation-content",
+            style={"display": "none"},
+            # Rendered on first visit, see register_tabs_callback
+            children=[],
+        ),
     ],
 )
 
 # Register callbacks
-register_tabs_callback(app)
-register_industry_callbacks(app, df, reverse_month_mapping)
+register_tabs_callback(app, build_prediction_tab)
+register_industry_callbacks(app, reservation_pyramid, reverse_month_mapping)
 register_lead_time_callbacks(app,df)
 register_deposit_type_callbacks(app,df)
-register_prediction_callbacks(app, form_model, feature_names)
+register_export_callbacks(app, reverse_month_mapping)
+register_segment_callbacks(app, segment_tables, reverse_month_mapping)
+register_distribution_callbacks(app, distribution_sketches, reverse_month_mapping)
+prediction_service = register_prediction_callbacks(
+    app,
+    etl.load_form_model_data,
+    batch_window_ms=PREDICTION_BATCH_WINDOW_MS,
+    max_batch_size=PREDICTION_MAX_BATCH_SIZE,
+    timeout_seconds=PREDICTION_TIMEOUT_SECONDS,
+)
+register_drift_routes(server, prediction_service)
+register_export_routes(server, df, reservation_pyramid, source_columns)
+if MEMORY_PROFILE_TOKEN:
+    register_memory_routes(
+        server,
+        MEMORY_PROFILE_TOKEN,
+        structures={
+            "dataset": lambda: df,
+            "reservation_pyramid": lambda: reservation_pyramid,
+            "segment_tables": lambda: segment_tables,
+            "distribution_sketches": lambda: distribution_sketches,
+            "static_figures": lambda: static_figures,
+            "prediction_tab": build_prediction_tab.peek,
+            "feature_importances": etl.load_feature_importances.peek,
+            "model_data": etl.load_full_model_data.peek,
+            "form_model_data": etl.load_form_model_data.peek,
+            "drift_monitor": lambda: prediction_service().drift_monitor if prediction_service.loaded() else None,
+        },
+        caches={
+            "what_if_surfaces": lambda: prediction_service.surface_cache_info()._asdict(),
+            "industry_callbacks_in_flight": single_flight.stats,
+            "loaded_artifacts": lambda: {
+                "prediction_tab": build_prediction_tab.loaded(),
+                "model_data": etl.load_full_model_data.loaded(),
+                "form_model_data": etl.load_form_model_data.loaded(),
+                "prediction_service": prediction_service.loaded(),
+            },
+        },
+    )
 
 if __name__ == "__main__":
     app.run_server(debug=True)
\ No newline at end of file
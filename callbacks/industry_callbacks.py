@@ -1,35 +1,47 @@
+from functools import partial
+from urllib.parse import urlencode
 from dash import Input, Output
-import plotly.graph_objects as go
 from src import graphics
-from src.graphics import hotel_reservation_evolution, lead_time_distribution
-from plotly.subplots import make_subplots
+from src.etl import DISTRIBUTION_COLUMNS, SEGMENT_COLUMNS
+from src.quantiles import percentile_bands
+from src.rendering import build_figures
+from src.segments import segment_summary, segment_trend, top_segments
+from src.singleflight import SingleFlight
+from src.timeseries import reservations_for_range
 
+# Identical requests in flight at the same time (e.g. everyone landing on the
+# default filters) share one computation per process. Results are not cached.
+single_flight = SingleFlight()
 
-def register_industry_callbacks(app, df, reverse_month_mapping):
+
+def register_industry_callbacks(app, reservation_pyramid, reverse_month_mapping):
     @app.callback(
         Output("hotel-reservation-evolution", "figure"),
         Input("month-range-slider", "value"),
+        Input("evolution-resolution", "value"),
     )
-    def update_hotel_reservation_evolution(date_range):
+    @single_flight.coalesce("update_hotel_reservation_evolution")
+    def update_hotel_reservation_evolution(date_range, resolution):
         start_index, end_index = map(int, sorted(date_range))
 
-        start_period = reverse_month_mapping[start_index]
-        end_period = reverse_month_mapping[end_index]
+        start_date = reverse_month_mapping[start_index].start_time
+        end_date = reverse_month_mapping[end_index].end_time
 
-        filtered_df = df[
-            (df["arrival_month"] >= start_period) & (df["arrival_month"] <= end_period)
-        ]
+        reservations, resolution_label = reservations_for_range(
+            reservation_pyramid, start_date, end_date, resolution
+        )
 
-        return hotel_reservation_evolution(filtered_df)
+        return graphics.hotel_reservation_evolution(reservations, resolution_label)
     
 def register_lead_time_callbacks(app, df):
     @app.callback(
         Output('lead-time-distribution', 'figure'),
         Input('show-cancellations', 'value')
     )
+    @single_flight.coalesce("update_lead_time_cancellation")
     def update_lead_time_cancellation(show_cancellations):
         show_cancel = 'show_cancelations' in show_cancellations
-        return lead_time_distribution(df, show_cancellations=show_cancel)
+        return graphics.lead_time_distribution(df, show_cancellations=show_cancel)
 
 def register_deposit_type_callbacks(app,df):
     @app.callback(
@@ -40,6 +52,7 @@ def register_deposit_type_callbacks(app,df):
         ],
         Input("hotel-type-filter", "value")
     )
+    @single_flight.coalesce("update_graphs")
     def update_graphs(hotel_type):
         if hotel_type == "City Hotel":
             filtered_df = df[df['hotel'] == "City Hotel"]
@@ -48,8 +61,107 @@ def register_deposit_type_callbacks(app,df):
         else:  # Both
             filtered_df = df
 
-        pie_chart = graphics.deposit_type_piechart(filtered_df)
-        bar_chart = graphics.deposit_type_barchart(filtered_df)
-        sankey_chart = graphics.reservation_flow_sankey(filtered_df)
+        # The three charts only need these counts, so they are computed once and shared.
+        deposit_counts = graphics.deposit_type_counts(filtered_df)
+        figures, _ = build_figures(
+            {
+                "pie_chart": partial(graphics.deposit_type_piechart, deposit_counts),
+                "bar_chart": partial(graphics.deposit_type_barchart, deposit_counts),
+                "sankey_chart": partial(graphics.reservation_flow_sankey, deposit_counts),
+            },
+            label="deposit type charts",
+        )
+
+        return figures["pie_chart"], figures["bar_chart"], figures["sankey_chart"]
+
+def register_segment_callbacks(app, segment_tables, reverse_month_mapping):
+    def ranking_for(dimension, top_n, date_range, hotel_type):
+        start_index, end_index = map(int, sorted(date_range))
+        summary = segment_summary(
+            segment_tables[dimension],
+            reverse_month_mapping[start_index],
+            reverse_month_mapping[end_index],
+            hotel_type,
+        )
+        return top_segments(summary, int(top_n))
 
-        return pie_chart, bar_chart, sankey_chart
+    @app.callback(
+        Output("segment-ranking", "figure"),
+        Input("segment-dimension", "value"),
+        Input("segment-top-n", "value"),
+        Input("month-range-slider", "value"),
+        Input("hotel-type-filter", "value"),
+    )
+    @single_flight.coalesce("update_segment_ranking")
+    def update_segment_ranking(dimension, top_n, date_range, hotel_type):
+        ranking = ranking_for(dimension, top_n, date_range, hotel_type)
+        return graphics.segment_cancellation_ranking(ranking, SEGMENT_COLUMNS[dimension])
+
+    # Clicking a bar drills down into that segment; otherwise the top ranked one is shown.
+    @app.callback(
+        Output("segment-trend", "figure"),
+        Input("segment-ranking", "clickData"),
+        Input("segment-dimension", "value"),
+        Input("segment-top-n", "value"),
+        Input("month-range-slider", "value"),
+        Input("hotel-type-filter", "value"),
+    )
+    @single_flight.coalesce("update_segment_trend")
+    def update_segment_trend(click_data, dimension, top_n, date_range, hotel_type):
+        ranking = ranking_for(dimension, top_n, date_range, hotel_type)
+        segments = ranking["segment"].astype(str).tolist()
+        clicked = click_data["points"][0]["y"] if click_data else None
+        segment = clicked if clicked in segments else next(iter(segments), None)
+
+        start_index, end_index = map(int, sorted(date_range))
+        trend = segment_trend(
+            segment_tables[dimension],
+            segment,
+            reverse_month_mapping[start_index],
+            reverse_month_mapping[end_index],
+            hotel_type,
+        )
+        return graphics.segment_trend_chart(trend, segment or "No segment with enough bookings", SEGMENT_COLUMNS[dimension])
+
+def register_distribution_callbacks(app, distribution_sketches, reverse_month_mapping):
+    @app.callback(
+        Output("distribution-bands", "figure"),
+        Input("distribution-metric", "value"),
+        Input("month-range-slider", "value"),
+        Input("hotel-type-filter", "value"),
+    )
+    @single_flight.coalesce("update_distribution_bands")
+    def update_distribution_bands(metric, date_range, hotel_type):
+        start_index, end_index = map(int, sorted(date_range))
+        monthly, overall = percentile_bands(
+            distribution_sketches[metric],
+            reverse_month_mapping[start_index],
+            reverse_month_mapping[end_index],
+            hotel_type,
+        )
+        return graphics.percentile_bands_chart(monthly, overall, DISTRIBUTION_COLUMNS[metric])
+
+def register_export_callbacks(app, reverse_month_mapping):
+    @app.callback(
+        [
+            Output("export-rows-csv", "href"),
+            Output("export-rows-parquet", "href"),
+            Output("export-reservations-csv", "href"),
+            Output("export-deposit-types-csv", "href"),
+        ],
+        Input("month-range-slider", "value"),
+        Input("hotel-type-filter", "value"),
+    )
+    def update_export_links(date_range, hotel_type):
+        start_index, end_index = map(int, sorted(date_range))
+        query = urlencode({
+            "start": str(reverse_month_mapping[start_index]),
+            "end": str(reverse_month_mapping[end_index]),
+            "hotel": hotel_type,
+        })
+        return (
+            f"/export/rows?{query}&format=csv",
+            f"/export/rows?{query}&format=parquet",
+            f"/export/reservations?{query}&format=csv",
+            f"/export/deposit-types?{query}&format=csv",
+        )
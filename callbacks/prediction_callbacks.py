@@ -1,12 +1,46 @@
-import pandas as pd
-from dash import Input, Output
-import plotly.graph_objects as go
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache, partial
+from types import SimpleNamespace
+from dash import Input, Output, no_update
 from src import graphics
-from src.graphics import hotel_reservation_evolution, lead_time_distribution
+from src.drift import DriftMonitor
+from src.features import FORM_FEATURES
+from src.lazy import once
+from src.scoring import MicroBatcher, WHAT_IF_ADR, WHAT_IF_PREVIOUS_CANCELLATIONS, has_input_scaling, score_rows, what_if_surface
+
+UNSCALED_MODEL_MESSAGE = (
+    "The deployed prediction model was saved without its input scaling, so its "
+    "probabilities would be wrong. Retrain it with form_model.py to enable predictions."
+)
+
+def register_prediction_callbacks(app, load_form_model_data, batch_window_ms=5, max_batch_size=256, timeout_seconds=10):
+    """
+    Register the prediction tab callbacks. The form model is only loaded when
+    the first of them runs; the returned accessor gives the loaded service and
+    ``surface_cache_info`` the occupancy of the what-if cache.
+    """
+    @once
+    def prediction_service():
+        form_model_data = load_form_model_data()
+        model = form_model_data["model"]
+        feature_names = form_model_data["feature_names"]
+        return SimpleNamespace(
+            model=model,
+            feature_names=feature_names,
+            scaled=has_input_scaling(model),
+            batcher=MicroBatcher(
+                partial(score_rows, model, feature_names),
+                window_ms=batch_window_ms,
+                max_batch_size=max_batch_size,
+            ),
+            drift_monitor=DriftMonitor(form_model_data.get("drift_reference")),
+        )
 
-def register_prediction_callbacks(app, model, feature_names):
     @app.callback(
-        Output("prediction-output", "children"),
+        [
+            Output("prediction-output", "children"),
+            Output("prediction-contributions", "figure"),
+        ],
         Input("predict-button", "n_clicks"),
         [
             Input("input-parking", "value"),
@@ -17,27 +51,68 @@ def register_prediction_callbacks(app, model, feature_names):
     )
     def predict_cancellation(n_clicks, parking, adr, previous_cancellations, deposit_type):
         if n_clicks is None:
-            return "Fill in the details and click Predict to see the result."
+            return "Fill in the details and click Predict to see the result.", no_update
 
-        input_data = pd.DataFrame({
-            "required_car_parking_spaces": [parking],
-            "adr": [adr],
-            "previous_cancellations": [previous_cancellations],
-            "deposit_type": [deposit_type],
-        })
+        values = [parking, adr, previous_cancellations, deposit_type]
+        if any(value is None for value in values):
+            return "Please fill in all the fields.", no_update
 
-        input_data = pd.get_dummies(input_data, drop_first=True)
+        service = prediction_service()
+        row = dict(zip(FORM_FEATURES, values))
+        service.drift_monitor.update({**row, "deposit_type": deposit_type.replace("deposit_type_", "", 1)})
 
-        for col in feature_names:
-            if col not in input_data.columns:
-                input_data[col] = 0
+        if not service.scaled:
+            return UNSCALED_MODEL_MESSAGE, no_update
 
-        input_data = input_data[feature_names]
+        # Concurrent requests are scored together by the batcher in one predict_proba pass.
+        try:
+            result = service.batcher.score(row, timeout=timeout_seconds)
+        except FutureTimeoutError:
+            return "The prediction service is not responding, please try again.", no_update
+        probability = result["probability"]
+        contributions_chart = graphics.prediction_contributions(result["contributions"], result["intercept"])
 
-        prediction = model.predict(input_data)[0] 
-        probability = model.predict_proba(input_data)[0][1] 
-
-        if prediction == 1:
-            return f"Prediction: Cancellation Likely ({probability * 100:.2f}% chance)"
+        if result["prediction"] == 1:
+            return f"Prediction: Cancellation Likely ({probability * 100:.2f}% chance)", contributions_chart
         else:
-            return f"Prediction: No Cancellation ({(1 - probability) * 100:.2f}% chance)"
+            return f"Prediction: No Cancellation ({(1 - probability) * 100:.2f}% chance)", contributions_chart
+
+    # Surfaces only depend on the deposit type and parking, so each one is scored once.
+    @lru_cache(maxsize=32)
+    def cached_surface(deposit_type, parking):
+        service = prediction_service()
+        return what_if_surface(service.model, service.feature_names, deposit_type, parking)
+
+    @app.callback(
+        Output("what-if-heatmap", "figure"),
+        Input("input-deposit-type", "value"),
+        Input("input-parking", "value"),
+    )
+    def update_what_if_heatmap(deposit_type, parking):
+        deposit_label = deposit_type.replace("deposit_type_", "") if deposit_type else "No Deposit Type"
+        if not prediction_service().scaled:
+            return graphics.what_if_heatmap(
+                WHAT_IF_ADR, WHAT_IF_PREVIOUS_CANCELLATIONS, None, deposit_label, message=UNSCALED_MODEL_MESSAGE
+            )
+
+        probabilities = cached_surface(deposit_type, parking or 0)
+        return graphics.what_if_heatmap(WHAT_IF_ADR, WHAT_IF_PREVIOUS_CANCELLATIONS, probabilities, deposit_label)
+
+    @app.callback(
+        [
+            Output("drift-table", "data"),
+            Output("drift-summary", "children"),
+        ],
+        # Chained on the prediction output, so the report includes the input just scored.
+        Input("prediction-output", "children"),
+        Input("drift-refresh", "n_intervals"),
+    )
+    def update_drift_table(prediction, n_intervals):
+        report = prediction_service().drift_monitor.report()
+        if not report["available"]:
+            return [], "No training reference in the deployed model; retrain it to enable drift monitoring."
+        summary = f"Inputs scored by this server since it started: {report['n_observed']}"
+        return graphics.prepare_drift_table(report), summary
+
+    prediction_service.surface_cache_info = cached_surface.cache_info
+    return prediction_service
@@ -1,8 +1,6 @@
-from dash import Output, Input, html
-from layouts.industry_info import industry_info_layout
-from layouts.predict_cancellation import predict_cancellation_layout
+from dash import Output, Input, State, no_update
 
-def register_tabs_callback(app):
+def register_tabs_callback(app, build_prediction_tab):
     @app.callback(
         [
             Output("industry-info-content", "style"),
@@ -16,3 +14,14 @@ def register_tabs_callback(app):
         elif tab_name == "predict-cancellation":
             return {"display": "none"}, {"display": "block"}
         return {"display": "none"}, {"display": "none"}
+
+    # The prediction tab loads the models, so it is only built when first opened.
+    @app.callback(
+        Output("predict-cancellation-content", "children"),
+        Input("tabs", "value"),
+        State("predict-cancellation-content", "children"),
+    )
+    def render_prediction_tab(tab_name, children):
+        if tab_name != "predict-cancellation" or children:
+            return no_update
+        return build_prediction_tab()
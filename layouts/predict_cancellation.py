@@ -1,8 +1,145 @@
-from dash import html
+from dash import dcc, html
+import dash_bootstrap_components as dbc
+from src import graphics
 
-predict_cancellation_layout = html.Div(
-    children=[
-        html.H3("Predict Your Cancellation", className="text-center mt-4"),
-        html.P("This section will include a machine learning model and visualizations."),
+
+def predict_cancellation_layout(metrics, evaluation, figures):
+    return [
+        html.H3(
+            "Cancellation Predictor - Overview",
+            style={"textAlign": "center", "marginBottom": "20px", "color": "#333", "marginTop": "20px"},
+        ),
+        html.Div(
+            style = {
+                "padding": "20px",
+            },
+            children = [
+                graphics.create_metrics_table(metrics), 
+                html.Div(
+                    children=[
+                        dcc.Graph(
+                            id="roc-pr-curves",
+                            figure=figures["roc_pr_curves"],
+                        ),
+                        html.Div(
+                            style={
+                                "display": "flex",
+                                "justifyContent": "space-between",
+                                "alignItems": "center",
+                            },
+                            children=[
+                                dcc.Graph(
+                                    id="calibration-curve",
+                                    figure=figures["calibration"],
+                                    style={"width": "45%"}
+                                ),
+                                html.Div(
+                                    graphics.create_threshold_table(evaluation),
+                                    style={"width": "55%"}
+                                ),
+                            ],
+                        ),
+                    ],
+                ) if evaluation else html.P(
+                    "Retrain the model to see its ROC, precision-recall and calibration curves.",
+                    style={"textAlign": "center", "color": "#333"},
+                ),
+                dcc.Graph(
+                    id="feature-importance-graph",
+                    figure=figures["feature_importances"]),
+            ],
+        ),
+        html.Div(
+            children = [
+                html.H3("Predict Cancellation", style={"textAlign": "center"}),
+
+                # Input form
+                html.Div(
+                    style={"width": "50%", "margin": "0 auto", "padding": "20px"},
+                    children=[
+                        dbc.Row(
+                            [
+                                dbc.Col(dbc.Label("Requested Parking Spaces"), width=4),
+                                dbc.Col(dbc.Input(id="input-parking", type="number", value=0), width=8),
+                            ],
+                            className="mb-3",
+                        ),
+                        dbc.Row(
+                            [
+                                dbc.Col(dbc.Label("Customer's Previous Cancellations"), width=4),
+                                dbc.Col(dbc.Input(id="input-previous-cancellations", type="number", value=0), width=8),
+                            ],
+                            className="mb-3",
+                        ),
+                        dbc.Row(
+                            [
+                                dbc.Col(dbc.Label("Deposit Type"), width=4),
+                                dbc.Col(
+                                    dcc.Dropdown(
+                                        id="input-deposit-type",
+                                        options=[
+                                            {"label": "No Deposit", "value": "deposit_type_No Deposit"},
+                                            {"label": "Non Refund", "value": "deposit_type_Non Refund"},
+                                            {"label": "Refundable", "value": "deposit_type_Refundable"},
+                                        ],
+                                        value="deposit_type_No Deposit", 
+                                    ),
+                                    width=8,
+                                ),
+                            ],
+                            className="mb-3",
+                        ),
+                        dbc.Row(
+                            [
+                                dbc.Col(dbc.Label("Average Daily Rate (ADR)"), width=4),
+                                dbc.Col(dbc.Input(id="input-adr", type="number", value=15), width=8),
+                            ],
+                            className="mb-3",
+                        ),
+                        html.Br(),
+                            dbc.Row(
+                                dbc.Col(
+                                    dbc.Button(
+                                        "Predict Cancellation", 
+                                        id="predict-button", 
+                                        color="primary",
+                                        style={"width": "100%"} 
+                                    ),
+                                    width=12,
+                                ),
+                                className="mb-3",
+                            ),
+                    ],
+                ),
+
+                # Output section
+                html.Div(
+                    id="prediction-output",
+                    style={"textAlign": "center", "padding": "20px", "fontSize": "20px"},
+                ),
+                dcc.Graph(
+                    id="prediction-contributions",
+                    style={"width": "60%", "margin": "0 auto"}
+                ),
+                html.P(
+                    "Cancellation risk for every ADR and previous cancellations combination, for the selected deposit type and parking spaces.",
+                    style={"textAlign": "center", "marginTop": "20px", "color": "#333"},
+                ),
+                dcc.Graph(
+                    id="what-if-heatmap",
+                    style={"width": "80%", "margin": "0 auto"}
+                ),
+                html.H3("Input Drift", style={"textAlign": "center", "marginTop": "20px"}),
+                html.P(
+                    "How the bookings scored here compare with the training data (PSI and KS per input).",
+                    style={"textAlign": "center", "color": "#333"},
+                ),
+                html.P(
+                    id="drift-summary",
+                    style={"textAlign": "center", "color": "#666"},
+                ),
+                graphics.create_drift_table(),
+                dcc.Interval(id="drift-refresh", interval=30_000),
+            ],
+        ),
     ]
-)
@@ -0,0 +1,8 @@
+from flask import jsonify
+
+
+def register_drift_routes(server, prediction_service):
+    @server.route("/api/drift")
+    def drift_report():
+        # Counts are per worker process, so the report covers this worker's traffic.
+        return jsonify(prediction_service().drift_monitor.report())
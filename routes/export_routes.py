@@ -0,0 +1,149 @@
+import io
+import numpy as np
+import pandas as pd
+from flask import Response, abort, request, stream_with_context
+from src.timeseries import RESOLUTIONS, slice_range
+
+# Rows serialized per chunk of the response.
+EXPORT_CHUNK_ROWS = 20_000
+
+HOTEL_TYPES = ("City Hotel", "Resort Hotel", "Both")
+
+MIMETYPES = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Write-only sink that hands back what was written since the last drain."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        # Parquet records absolute offsets, so report everything written so far.
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_csv(frames):
+    header = True
+    for frame in frames:
+        yield frame.to_csv(index=False, header=header)
+        header = False
+
+
+def iter_parquet(frames):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _StreamBuffer()
+    writer = None
+    for frame in frames:
+        table = pa.Table.from_pandas(frame, preserve_index=False, schema=writer.schema if writer else None)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, table.schema)
+        writer.write_table(table)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def iter_chunks(df, positions, columns):
+    # Only one chunk of rows is copied at a time; an empty export still gets its header.
+    column_positions = df.columns.get_indexer(columns)
+    for start in range(0, max(len(positions), 1), EXPORT_CHUNK_ROWS):
+        yield df.iloc[positions[start:start + EXPORT_CHUNK_ROWS], column_positions]
+
+
+def parse_filters():
+    try:
+        start = pd.Period(request.args["start"], "M")
+        end = pd.Period(request.args["end"], "M")
+    except (KeyError, ValueError):
+        abort(400, description="start and end must be months formatted as YYYY-MM")
+
+    hotel = request.args.get("hotel", "Both")
+    if hotel not in HOTEL_TYPES:
+        abort(400, description=f"hotel must be one of {', '.join(HOTEL_TYPES)}")
+
+    file_format = request.args.get("format", "csv")
+    if file_format not in MIMETYPES:
+        abort(400, description="format must be csv or parquet")
+    if file_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            abort(501, description="Parquet export needs pyarrow installed on the server")
+
+    return min(start, end), max(start, end), hotel, file_format
+
+
+def stream_response(frames, name, file_format):
+    body = iter_csv(frames) if file_format == "csv" else iter_parquet(frames)
+    return Response(
+        stream_with_context(body),
+        mimetype=MIMETYPES[file_format],
+        headers={"Content-Disposition": f"attachment; filename={name}.{file_format}"},
+    )
+
+
+def register_export_routes(server, df, reservation_pyramid, columns):
+    @server.route("/export/rows")
+    def export_rows():
+        start, end, hotel, file_format = parse_filters()
+
+        mask = (df["arrival_month"] >= start) & (df["arrival_month"] <= end)
+        if hotel != "Both":
+            mask &= df["hotel"] == hotel
+        positions = np.flatnonzero(mask.to_numpy())
+
+        return stream_response(iter_chunks(df, positions, columns), f"bookings_{start}_{end}", file_format)
+
+    @server.route("/export/reservations")
+    def export_reservations():
+        start, end, hotel, file_format = parse_filters()
+        resolution = request.args.get("resolution", "M")
+        if resolution not in RESOLUTIONS:
+            abort(400, description="resolution must be D, W or M")
+
+        rollup = slice_range(reservation_pyramid[resolution], start.start_time, end.end_time)
+        if hotel != "Both":
+            rollup = rollup[[hotel]] if hotel in rollup.columns else rollup.iloc[:, :0]
+        reservations = rollup.reset_index().melt(
+            id_vars="arrival_date", var_name="hotel", value_name="reservations"
+        )
+
+        frames = (
+            reservations.iloc[i:i + EXPORT_CHUNK_ROWS]
+            for i in range(0, max(len(reservations), 1), EXPORT_CHUNK_ROWS)
+        )
+        return stream_response(frames, f"reservations_{resolution}_{start}_{end}", file_format)
+
+    @server.route("/export/deposit-types")
+    def export_deposit_types():
+        start, end, hotel, file_format = parse_filters()
+
+        mask = (df["arrival_month"] >= start) & (df["arrival_month"] <= end)
+        if hotel != "Both":
+            mask &= df["hotel"] == hotel
+        counts = (
+            df.loc[mask, ["deposit_type", "is_canceled"]]
+            .groupby(["deposit_type", "is_canceled"])
+            .size()
+            .reset_index(name="count")
+        )
+
+        return stream_response(iter([counts]), f"deposit_types_{start}_{end}", file_format)
@@ -0,0 +1,47 @@
+import hmac
+import os
+from flask import abort, jsonify, request
+from src.memory import AllocationTracker, deep_size, process_memory
+
+GROUP_BY = ("lineno", "filename")
+
+
+def register_memory_routes(server, token, structures, caches):
+    """
+    Admin report of this worker's memory, guarded by ``token``.
+
+    ``structures`` maps a name to a callable returning the object to size, or
+    None when it has not been built yet. ``caches`` maps a name to a callable
+    returning a JSON-serializable description of the cache's occupancy.
+    """
+    tracker = AllocationTracker()
+
+    @server.route("/admin/memory")
+    def memory_report():
+        supplied = request.headers.get("X-Admin-Token") or request.args.get("token", "")
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(403)
+
+        group_by = request.args.get("group_by", "lineno")
+        if group_by not in GROUP_BY:
+            abort(400, description="group_by must be lineno or filename")
+        try:
+            limit = int(request.args.get("limit", 25))
+        except ValueError:
+            abort(400, description="limit must be an integer")
+
+        sizes = {}
+        for name, get in structures.items():
+            obj = get()
+            sizes[name] = None if obj is None else deep_size(obj)
+
+        # Every gunicorn worker has its own copy of all of this; pid tells which one answered.
+        return jsonify(
+            {
+                "pid": os.getpid(),
+                **process_memory(),
+                "structures_bytes": sizes,
+                "caches": {name: describe() for name, describe in caches.items()},
+                "allocations": tracker.diff(group_by, limit),
+            }
+        )
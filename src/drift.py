@@ -0,0 +1,143 @@
+import threading
+import numpy as np
+
+# Quantiles used as bin edges for numeric features (deciles).
+REFERENCE_QUANTILES = np.linspace(0.1, 0.9, 9)
+
+# Common PSI reading: below 0.1 stable, 0.1 to 0.25 moderate shift, above significant.
+PSI_THRESHOLDS = (0.1, 0.25)
+
+_EPSILON = 1e-4
+
+
+def build_reference(X):
+    """
+    Fixed-size training-time sketches of the model inputs.
+
+    Numeric columns get decile bin edges and the count of rows in every bin
+    (open-ended on both sides). Integer columns whose deciles collapse also get
+    a bin of their own for every edge value. Other columns get the count of
+    every category.
+    Only plain lists are stored so the artifact does not depend on this module.
+    """
+    reference = {}
+    for col in X.columns:
+        values = X[col].dropna()
+        if np.issubdtype(values.dtype, np.number):
+            edges = np.unique(np.quantile(values, REFERENCE_QUANTILES))
+            if len(edges) < len(REFERENCE_QUANTILES) and np.all(np.mod(values, 1) == 0):
+                # Deciles of zero-heavy counts collapse (e.g. to [0]), so each edge
+                # value of such an integer column gets its own bin [v, v + 1).
+                edges = np.unique(np.r_[edges, edges + 1])
+            reference[col] = {"kind": "numeric", "edges": edges.tolist(), "counts": [0] * (len(edges) + 1)}
+        else:
+            categories = sorted(values.astype(str).unique().tolist())
+            reference[col] = {"kind": "categorical", "categories": categories, "counts": [0] * len(categories)}
+    add_to_reference(reference, X)
+    return reference
+
+
+def add_to_reference(reference, X):
+    """Add a chunk of training rows to the reference counts (bins stay fixed)."""
+    for col, sketch in reference.items():
+        counts = np.asarray(sketch["counts"], dtype=np.int64)
+        counts += np.bincount(_bin_indices(sketch, X[col].dropna().to_numpy()), minlength=len(counts))[:len(counts)]
+        sketch["counts"] = counts.tolist()
+    return reference
+
+
+def _bin_indices(sketch, values):
+    if sketch["kind"] == "numeric":
+        return np.searchsorted(sketch["edges"], values.astype(float), side="right")
+    lookup = {category: i for i, category in enumerate(sketch["categories"])}
+    # Unseen categories go to an extra bucket past the reference ones.
+    return np.array([lookup.get(str(value), len(lookup)) for value in values], dtype=np.int64)
+
+
+def psi(expected, actual):
+    expected = np.maximum(expected / max(expected.sum(), 1), _EPSILON)
+    actual = np.maximum(actual / max(actual.sum(), 1), _EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks_statistic(expected, actual):
+    """Kolmogorov-Smirnov distance between two binned distributions."""
+    expected_cdf = np.cumsum(expected) / max(expected.sum(), 1)
+    actual_cdf = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(expected_cdf - actual_cdf)))
+
+
+class DriftMonitor:
+    """
+    Live histograms of the scored inputs, binned like the training reference.
+
+    ``update`` costs O(1) per request (a search over at most ten edges or a dict
+    lookup) and memory never grows with the number of predictions. Each
+    process keeps its own counts.
+    """
+
+    def __init__(self, reference):
+        self.reference = reference or {}
+        self._lookups = {
+            col: {category: i for i, category in enumerate(sketch["categories"])}
+            for col, sketch in self.reference.items() if sketch["kind"] == "categorical"
+        }
+        self._counts = {
+            col: np.zeros(len(sketch["counts"]) + (sketch["kind"] == "categorical"), dtype=np.int64)
+            for col, sketch in self.reference.items()
+        }
+        self._lock = threading.Lock()
+        self.n_observed = 0
+
+    @property
+    def available(self):
+        return bool(self.reference)
+
+    def update(self, row):
+        with self._lock:
+            for col, sketch in self.reference.items():
+                value = row.get(col)
+                if value is None:
+                    continue
+                if sketch["kind"] == "numeric":
+                    index = int(np.searchsorted(sketch["edges"], float(value), side="right"))
+                else:
+                    lookup = self._lookups[col]
+                    index = lookup.get(str(value), len(lookup))
+                self._counts[col][index] += 1
+            self.n_observed += 1
+
+    def report(self):
+        if not self.available:
+            return {"available": False, "n_observed": self.n_observed, "features": {}}
+
+        with self._lock:
+            counts = {col: values.copy() for col, values in self._counts.items()}
+            n_observed = self.n_observed
+
+        features = {}
+        for col, sketch in self.reference.items():
+            expected = np.asarray(sketch["counts"], dtype=float)
+            actual = counts[col].astype(float)
+            if sketch["kind"] == "categorical":
+                expected = np.r_[expected, 0.0]
+            feature_psi = psi(expected, actual) if actual.sum() else None
+            features[col] = {
+                "kind": sketch["kind"],
+                "n_observed": int(actual.sum()),
+                "psi": feature_psi,
+                "ks": ks_statistic(expected, actual) if actual.sum() and sketch["kind"] == "numeric" else None,
+                "status": drift_status(feature_psi),
+            }
+
+        return {"available": True, "n_observed": n_observed, "features": features}
+
+
+def drift_status(value):
+    if value is None:
+        return "No data"
+    if value < PSI_THRESHOLDS[0]:
+        return "Stable"
+    if value < PSI_THRESHOLDS[1]:
+        return "Moderate shift"
+    return "Significant shift"
@@ -1,5 +1,7 @@
 import pandas as pd
 import pickle
+from src import quantiles
+from src.lazy import once
 
 def load_data():
     file = "data/clean_hotel_bookings.csv" 
@@ -10,15 +12,81 @@ def load_data():
 
     return df
 
-def load_model_data():
-    
-    with open("src/feature_importances.pkl", "rb") as f:
-        feature_importances = pickle.load(f)
+def build_reservation_pyramid(df):
+    """
+    Precompute reservation counts per hotel at daily, weekly and monthly resolution.
 
-    with open("src/model.pkl", "rb") as f:
-        model_data = pickle.load(f)
+    Each level is a wide frame indexed by the bucket start date with one column per
+    hotel, so a date range can be sliced without touching the raw rows.
+    """
+    daily = (
+        df.groupby([df["arrival_date"].dt.normalize(), "hotel"])
+        .size()
+        .unstack("hotel", fill_value=0)
+        .sort_index()
+        .asfreq("D", fill_value=0)
+    )
+    daily.index.name = "arrival_date"
 
-    with open("src/form_model.pkl", "rb") as f:
-        form_model_data = pickle.load(f)
+    weekly = daily.groupby(daily.index.to_period("W").start_time).sum()
+    monthly = daily.groupby(daily.index.to_period("M").start_time).sum()
+    weekly.index.name = monthly.index.name = "arrival_date"
 
-    return feature_importances, model_data, form_model_data
\ No newline at end of file
+    return {"D": daily, "W": weekly, "M": monthly}
+
+# Columns with a precomputed segment table, and their display names.
+SEGMENT_COLUMNS = {
+    "country": "Country",
+    "market_segment": "Market Segment",
+    "distribution_channel": "Distribution Channel",
+}
+
+def build_segment_tables(df):
+    """
+    Precompute booking counts and sums per segment, hotel and arrival month.
+
+    One long table per segment column, sorted by month so a date range is a
+    contiguous slice. Rates and averages for any range and hotel are derived
+    from the summed columns, so views never go back to the raw rows.
+    """
+    tables = {}
+    for column in SEGMENT_COLUMNS:
+        table = (
+            df.groupby(["arrival_month", "hotel", df[column].fillna("Unknown").rename("segment")], observed=True)
+            .agg(
+                bookings=("is_canceled", "size"),
+                cancellations=("is_canceled", "sum"),
+                adr_sum=("adr", "sum"),
+                lead_time_sum=("lead_time", "sum"),
+            )
+            .reset_index(["hotel", "segment"])
+            .sort_index(kind="stable")
+        )
+        table[["hotel", "segment"]] = table[["hotel", "segment"]].astype("category")
+        tables[column] = table
+
+    return tables
+
+# Columns with per month and hotel quantile sketches, and their display names.
+DISTRIBUTION_COLUMNS = {
+    "adr": "Average Daily Rate",
+    "lead_time": "Lead Time (days)",
+}
+
+def build_distribution_sketches(df):
+    """
+    Mergeable quantile sketches (t-digests) per column, arrival month and hotel.
+
+    Percentiles of any date range come from merging the monthly sketches, so
+    they never need the raw rows to be sorted again.
+    """
+    return {column: quantiles.build_sketches(df, column) for column in DISTRIBUTION_COLUMNS}
+
+def _load_pickle(file):
+    with open(file, "rb") as f:
+        return pickle.load(f)
+
+# Unpickling the models imports scikit-learn, so each artifact is loaded on first use.
+load_feature_importances = once(lambda: _load_pickle("src/feature_importances.pkl"))
+load_full_model_data = once(lambda: _load_pickle("src/model.pkl"))
+load_form_model_data = once(lambda: _load_pickle("src/form_model.pkl"))
@@ -0,0 +1,83 @@
+import numpy as np
+
+# Relative cost of flagging a booking that is honoured vs. missing a cancellation.
+COST_FALSE_POSITIVE = 1.0
+COST_FALSE_NEGATIVE = 2.0
+
+THRESHOLDS = np.round(np.arange(0.05, 1.0, 0.05), 2)
+
+
+def _downsample(n, n_points):
+    return np.unique(np.linspace(0, n - 1, min(n, n_points)).round().astype(int))
+
+
+def evaluate_scores(y_true, y_score, n_points=200, n_bins=10,
+                    cost_false_positive=COST_FALSE_POSITIVE, cost_false_negative=COST_FALSE_NEGATIVE):
+    """
+    ROC and precision-recall curves, calibration bins and a cost-based threshold
+    table from a single descending sort of the scores.
+
+    Curves are downsampled to at most ``n_points`` points and stored as float32,
+    so the result is small enough to keep in the model artifact.
+    """
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_score = np.asarray(y_score, dtype=float)
+
+    order = np.argsort(-y_score, kind="mergesort")
+    y_sorted = y_true[order]
+    score_sorted = y_score[order]
+
+    tps = np.cumsum(y_sorted)
+    fps = np.arange(1, len(y_sorted) + 1) - tps
+    positives, negatives = tps[-1], fps[-1]
+
+    # Curve points are taken at the last occurrence of every distinct score.
+    distinct = np.r_[np.flatnonzero(np.diff(score_sorted)), len(score_sorted) - 1]
+    tpr = np.r_[0.0, tps[distinct] / max(positives, 1)]
+    fpr = np.r_[0.0, fps[distinct] / max(negatives, 1)]
+    precision = np.r_[1.0, tps[distinct] / (tps[distinct] + fps[distinct])]
+    curve_thresholds = np.r_[1.0, score_sorted[distinct]]
+
+    roc_auc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+    average_precision = float(np.sum(np.diff(tpr) * precision[1:]))
+
+    keep = _downsample(len(tpr), n_points)
+
+    # Rows with score >= t are the first k of the descending order.
+    k = np.searchsorted(-score_sorted, -THRESHOLDS, side="right")
+    tp_at = np.r_[0, tps][k]
+    fp_at = np.r_[0, fps][k]
+    fn_at = positives - tp_at
+
+    bins = np.minimum((y_score * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    filled = counts > 0
+
+    return {
+        "n_samples": int(len(y_true)),
+        "roc_auc": roc_auc,
+        "average_precision": average_precision,
+        "roc": {
+            "fpr": fpr[keep].astype(np.float32),
+            "tpr": tpr[keep].astype(np.float32),
+            "thresholds": curve_thresholds[keep].astype(np.float32),
+        },
+        "pr": {
+            "recall": tpr[keep].astype(np.float32),
+            "precision": precision[keep].astype(np.float32),
+            "thresholds": curve_thresholds[keep].astype(np.float32),
+        },
+        "calibration": {
+            "mean_predicted": (np.bincount(bins, weights=y_score, minlength=n_bins)[filled] / counts[filled]).astype(np.float32),
+            "fraction_positive": (np.bincount(bins, weights=y_true, minlength=n_bins)[filled] / counts[filled]).astype(np.float32),
+            "count": counts[filled],
+        },
+        "thresholds": {
+            "threshold": THRESHOLDS.astype(np.float32),
+            "precision": np.divide(tp_at, k, out=np.ones(len(k)), where=k > 0).astype(np.float32),
+            "recall": (tp_at / max(positives, 1)).astype(np.float32),
+            "flagged_rate": (k / len(y_true)).astype(np.float32),
+            "cost": ((fp_at * cost_false_positive + fn_at * cost_false_negative) / len(y_true)).astype(np.float32),
+        },
+        "costs": {"false_positive": cost_false_positive, "false_negative": cost_false_negative},
+    }
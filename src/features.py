@@ -0,0 +1,82 @@
+TARGET = "is_canceled"
+
+# Inputs of the prediction form model.
+FORM_FEATURES = ["required_car_parking_spaces", "adr", "previous_cancellations", "deposit_type"]
+
+
+def build_feature_schema(X):
+    """
+    Describe the model inputs: numeric columns and the fixed category list of
+    every categorical column. Saved with the model so encoding is reproducible.
+    """
+    numeric = X.select_dtypes(include="number").columns.tolist()
+    categorical = [col for col in X.columns if col not in numeric]
+
+    schema = {
+        "numeric": numeric,
+        "categorical": {
+            col: sorted(X[col].dropna().astype(str).unique().tolist()) for col in categorical
+        },
+    }
+    schema["feature_names"] = encoded_feature_names(schema)
+    return schema
+
+
+def encoded_feature_names(schema):
+    # Same naming and order as pd.get_dummies on the raw columns.
+    names = list(schema["numeric"])
+    for col, categories in schema["categorical"].items():
+        names.extend(f"{col}_{category}" for category in categories)
+    return names
+
+
+def prepare_frame(X, schema):
+    """Select the schema columns in order, with categorical values as strings."""
+    X = X[schema["numeric"] + list(schema["categorical"])].copy()
+    for col in schema["categorical"]:
+        X[col] = X[col].astype(str)
+    return X
+
+
+def make_encoder(schema):
+    """
+    Sparse one-hot encoder for the categorical columns; numeric columns pass through.
+
+    Categories come from the schema, so the output columns never depend on the
+    data the encoder is fitted on.
+    """
+    # scikit-learn is imported here so the app can use the constants above without loading it.
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder
+
+    categorical = list(schema["categorical"])
+    return ColumnTransformer(
+        [
+            ("num", "passthrough", schema["numeric"]),
+            (
+                "cat",
+                OneHotEncoder(
+                    categories=[schema["categorical"][col] for col in categorical],
+                    handle_unknown="ignore",
+                    sparse_output=True,
+                ),
+                categorical,
+            ),
+        ],
+        sparse_threshold=1.0,
+        verbose_feature_names_out=False,
+    )
+
+
+def make_pipeline(schema, classifier):
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    # with_mean=False keeps the one-hot matrix sparse while scaling every column.
+    return Pipeline(
+        [
+            ("encode", make_encoder(schema)),
+            ("scale", StandardScaler(with_mean=False)),
+            ("clf", classifier),
+        ]
+    )
@@ -2,15 +2,19 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, classification_report
+from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 import pickle
+import features
+import evaluation
+import drift
 
 
 file = "C:\\Users\\arias\\OneDrive - Universidad Pontificia Comillas\\AÑO 5\\Visualización\\Hotel Cancellation\\data\\clean_hotel_bookings.csv"
 df = pd.read_csv(file)
 
 
-selected_features = ["required_car_parking_spaces", "adr", "previous_cancellations", "deposit_type"]
+selected_features = features.FORM_FEATURES
 X = df[selected_features]
 y = df["is_canceled"]
 
@@ -20,14 +24,17 @@ X = pd.get_dummies(X)
 feature_names = X.columns.tolist()
 
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
 
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.3, random_state=42, stratify=y)
-
-
-model = LogisticRegression(max_iter=500, random_state=42)
+# The scaler is fitted on the training split and saved with the classifier, so
+# the app scores raw form values and contributions are per scaled input.
+model = Pipeline(
+    [
+        ("scale", StandardScaler()),
+        ("clf", LogisticRegression(max_iter=500, random_state=42)),
+    ]
+)
 model.fit(X_train, y_train)
 
 # Make predictions
@@ -38,6 +45,10 @@ y_pred_proba = model.predict_proba(X_test)[:, 1]
 metrics = {
     "accuracy": accuracy_score(y_test, y_pred),
 }
+model_evaluation = evaluation.evaluate_scores(y_test, y_pred_proba)
+
+# Training-time input distribution, compared with live form inputs by the app.
+drift_reference = drift.build_reference(df[selected_features])
 
 # Save the trained model
 with open("form_model.pkl", "wb") as f:
@@ -45,6 +56,8 @@ with open("form_model.pkl", "wb") as f:
         {
             "model": model,
             "metrics": metrics,
+            "evaluation": model_evaluation,
+            "drift_reference": drift_reference,
             "feature_names": feature_names
         },
         f,
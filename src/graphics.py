@@ -1,27 +1,20 @@
 import pandas as pd
 import dash_table
+from dash import html
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
 ###########-------------------INDUSTRY TAB VISUALIZATIONS-------------------
 
-def hotel_reservation_evolution(df):
-    df['arrival_date'] = pd.to_datetime(df['arrival_date'], errors='coerce')
-
-    df['arrival_month'] = df['arrival_date'].dt.to_period('M')
-
-    monthly_reservations = df.groupby(['arrival_month', 'hotel']).size().reset_index(name='reservations')
-
-    monthly_reservations['arrival_month'] = monthly_reservations['arrival_month'].dt.to_timestamp()
-
+def hotel_reservation_evolution(reservations, resolution="Monthly"):
     fig = px.line(
-        monthly_reservations,
-        x='arrival_month',
+        reservations,
+        x='arrival_date',
         y='reservations',
         color='hotel',
-        labels={'arrival_month': 'Date', 'reservations': 'Number of Reservations', 'hotel': 'Hotel Type'},
-        title = "Monthly Evolution of Hotel Reservations"
+        labels={'arrival_date': 'Date', 'reservations': 'Number of Reservations', 'hotel': 'Hotel Type'},
+        title = f"{resolution} Evolution of Hotel Reservations"
     )
 
     fig.update_layout(
@@ -42,17 +35,12 @@ def year_reservations_cancellation(df):
         "Canceled": "#a6cee3",      # Light blue (~level 10 in the heatmap legend)
     }
 
-   
-    df['arrival_year'] = df['arrival_date'].dt.year
-
-   
-    df['cancellation_status'] = df['is_canceled'].replace({0: 'Not Canceled', 1: 'Canceled'})
-
-    
-    df['hotel'] = df['hotel'].replace({'City Hotel': 'City Hotel', 'Resort Hotel': 'Resort Hotel'})
-
-    
-    yearly_reservations = df.groupby(['arrival_year', 'hotel', 'cancellation_status']).size().reset_index(name='reservations')
+    # Group on derived series instead of adding columns, so the shared frame is never mutated.
+    yearly_reservations = df.groupby([
+        df['arrival_date'].dt.year.rename('arrival_year'),
+        'hotel',
+        df['is_canceled'].map({0: 'Not Canceled', 1: 'Canceled'}).rename('cancellation_status'),
+    ]).size().reset_index(name='reservations')
     
     fig = px.bar(
         yearly_reservations,
@@ -193,7 +181,11 @@ def lead_time_cancellation_heatmap(df):
 
     return fig
 
-def deposit_type_piechart(filtered_df):
+def deposit_type_counts(filtered_df):
+    """Bookings per deposit type and cancellation flag, shared by the deposit type charts."""
+    return filtered_df.groupby(['deposit_type', 'is_canceled']).size().reset_index(name='count')
+
+def deposit_type_piechart(deposit_counts):
 
     custom_colors = {
         "No Deposit": "#8c0650",   
@@ -201,11 +193,10 @@ def deposit_type_piechart(filtered_df):
         "Refundable": "#ff038e"       
     }
    
-    deposit_type_counts = filtered_df['deposit_type'].value_counts().reset_index()
-    deposit_type_counts.columns = ['deposit_type', 'count']
+    deposit_totals = deposit_counts.groupby('deposit_type')['count'].sum().reset_index()
 
     fig = px.pie(
-        deposit_type_counts,
+        deposit_totals,
         names='deposit_type',
         values='count',
         title='Distribution of Deposit Types',
@@ -220,15 +211,15 @@ def deposit_type_piechart(filtered_df):
 
     return fig
 
-def deposit_type_barchart(filtered_df):
+def deposit_type_barchart(deposit_counts):
     custom_colors = {
         "Not Canceled": "#377eb8",  
         "Canceled": "#a6cee3",      
     }
     
-    filtered_df['cancellation_status'] = filtered_df['is_canceled'].replace({0: 'Not Canceled', 1: 'Canceled'})
-
-    cancellations_by_deposit = filtered_df.groupby(['deposit_type', 'cancellation_status']).size().reset_index(name='count')
+    cancellations_by_deposit = deposit_counts.assign(
+        cancellation_status=deposit_counts['is_canceled'].map({0: 'Not Canceled', 1: 'Canceled'})
+    )
     total_by_deposit = cancellations_by_deposit.groupby('deposit_type')['count'].transform('sum')
     cancellations_by_deposit['percentage'] = (cancellations_by_deposit['count'] / total_by_deposit) * 100
 
@@ -260,9 +251,9 @@ def deposit_type_barchart(filtered_df):
 
     return fig
 
-def reservation_flow_sankey(filtered_df):
+def reservation_flow_sankey(deposit_counts):
    
-    sankey_data = filtered_df.groupby(['deposit_type', 'is_canceled']).size().reset_index(name='count')
+    sankey_data = deposit_counts.copy()
 
    
     total_count = sankey_data['count'].sum()
@@ -292,9 +283,9 @@ def reservation_flow_sankey(filtered_df):
         custom_colors["Not Canceled"]
     ]
 
-    # Prepare source, target, and value data for Sankey links
-    sources = [0, 1, 2, 0, 1, 2]  # Indices of source nodes
-    targets = [3, 3, 3, 4, 4, 4]  # Indices of target nodes
+    # Prepare source, target, and value data for Sankey links, one per (deposit type, status) row
+    sources = sankey_data['deposit_type'].map(node_labels.index).tolist()  # Indices of source nodes
+    targets = sankey_data['is_canceled_label'].map(node_labels.index).tolist()  # Indices of target nodes
     values = sankey_data['count'].tolist()
     percentages = sankey_data['percentage'].tolist()
 
@@ -326,8 +317,114 @@ def reservation_flow_sankey(filtered_df):
     fig.update_layout(
         title_text="Reservation Flow by Deposit Type and Cancellation Status (with Percentages)",
         font_size=12,
-        paper_bgcolor='rgba(0,0,0,0)', 
+        paper_bgcolor='rgba(0,0,0,0)',
+    )
+
+    return fig
+
+def segment_cancellation_ranking(ranking, segment_label):
+    # Highest rate on top; the horizontal layout keeps long segment names readable.
+    ranking = ranking.iloc[::-1]
+
+    fig = go.Figure(go.Bar(
+        x=ranking['cancellation_rate'] * 100,
+        y=ranking['segment'].astype(str),
+        orientation='h',
+        marker_color='#c90672',
+        customdata=ranking[['bookings', 'cancellations', 'average_adr', 'average_lead_time']],
+        hovertemplate=(
+            "%{y}<br>" +
+            "Cancellation Rate: %{x:.1f}%<br>" +
+            "Bookings: %{customdata[0]}<br>" +
+            "Cancellations: %{customdata[1]}<br>" +
+            "Average ADR: %{customdata[2]:.2f}<br>" +
+            "Average Lead Time: %{customdata[3]:.0f} days<extra></extra>"
+        ),
+    ))
+
+    fig.update_layout(
+        title=f'Highest Cancellation Rates by {segment_label}',
+        xaxis=dict(title='Cancellation Rate (%)', gridcolor='lightgrey'),
+        yaxis=dict(title=segment_label),
+        height=max(300, 40 * len(ranking) + 120),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+
+    return fig
+
+def segment_trend_chart(trend, segment, segment_label):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    for hotel, rows in trend.groupby('hotel', observed=True):
+        fig.add_trace(
+            go.Bar(x=rows['arrival_month'], y=rows['bookings'], name=f'{hotel} Bookings', opacity=0.5),
+            secondary_y=False,
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=rows['arrival_month'],
+                y=rows['cancellation_rate'] * 100,
+                mode='lines+markers',
+                name=f'{hotel} Cancellation Rate',
+            ),
+            secondary_y=True,
+        )
+
+    fig.update_layout(
+        title=f'{segment_label}: {segment}',
+        barmode='group',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        legend=dict(orientation='h', yanchor='bottom', y=-0.3),
     )
+    fig.update_yaxes(title_text='Bookings', gridcolor='lightgrey', secondary_y=False)
+    fig.update_yaxes(title_text='Cancellation Rate (%)', range=[0, 100], showgrid=False, secondary_y=True)
+
+    return fig
+
+def percentile_bands_chart(monthly, overall, metric_label):
+    colors = {"City Hotel": "31, 119, 180", "Resort Hotel": "201, 6, 114"}
+    fig = go.Figure()
+
+    for hotel, rows in monthly.groupby('hotel'):
+        color = colors.get(hotel, "100, 100, 100")
+        fig.add_trace(go.Scatter(
+            x=rows['arrival_month'], y=rows['p90'], mode='lines',
+            line=dict(width=0), showlegend=False, hoverinfo='skip',
+        ))
+        fig.add_trace(go.Scatter(
+            x=rows['arrival_month'], y=rows['p10'], mode='lines',
+            line=dict(width=0), fill='tonexty', fillcolor=f'rgba({color}, 0.2)',
+            name=f'{hotel} p10-p90', customdata=rows[['p90']],
+            hovertemplate="p10: %{y:.1f}<br>p90: %{customdata[0]:.1f}<extra></extra>",
+        ))
+        fig.add_trace(go.Scatter(
+            x=rows['arrival_month'], y=rows['p50'], mode='lines+markers',
+            line=dict(color=f'rgb({color})'), name=f'{hotel} median',
+            hovertemplate="Median: %{y:.1f}<extra></extra>",
+        ))
+
+    # Percentiles of the whole selected range, from the merged monthly sketches.
+    summary = "<br>".join(
+        f"{row.hotel}: median {row.p50:.1f} (p10 {row.p10:.1f}, p90 {row.p90:.1f})"
+        for row in overall.itertuples()
+    )
+
+    fig.update_layout(
+        title=f'Monthly Percentiles of {metric_label}',
+        xaxis=dict(title='Arrival Month'),
+        yaxis=dict(title=metric_label, gridcolor='lightgrey'),
+        hovermode='x unified',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        margin=dict(b=60 + 20 * len(overall)),
+    )
+    if summary:
+        fig.add_annotation(
+            text=f"Selected range: {summary}", xref='paper', yref='paper', x=0, y=-0.2,
+            showarrow=False, align='left', xanchor='left', yanchor='top',
+        )
 
     return fig
 
@@ -380,6 +477,85 @@ def plot_feature_importances(feature_importances: dict, top_n: int = 10):
     return fig
 
 
+def what_if_heatmap(adr_values, previous_values, probabilities, deposit_label, message=None):
+    if message is not None:
+        # No surface to show (e.g. the model cannot score raw inputs), only the reason.
+        fig = go.Figure()
+        fig.add_annotation(text=message, xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(
+            title=f"What-if Cancellation Risk ({deposit_label})",
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+        )
+        return fig
+
+    fig = go.Figure(
+        data=go.Heatmap(
+            x=adr_values,
+            y=previous_values,
+            z=probabilities * 100,
+            zmin=0,
+            zmax=100,
+            colorscale="Blues",
+            colorbar=dict(title="Cancellation (%)"),
+            hovertemplate=(
+                "ADR: %{x}<br>"
+                "Previous Cancellations: %{y}<br>"
+                "Cancellation Probability: %{z:.1f}%<extra></extra>"
+            ),
+        )
+    )
+
+    fig.update_layout(
+        title=f"What-if Cancellation Risk ({deposit_label})",
+        xaxis_title="Average Daily Rate (ADR)",
+        yaxis_title="Customer's Previous Cancellations",
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+
+    return fig
+
+
+def prediction_contributions(contributions: dict, intercept: float):
+    """
+    Horizontal bar chart of how each input pushed one prediction's log-odds.
+
+    Parameters:
+    - contributions (dict): Feature names and their contribution to the log-odds.
+    - intercept (float): Model intercept, shown as the baseline in the title.
+
+    Returns:
+    - fig (plotly.graph_objects.Figure): The contribution breakdown figure.
+    """
+    contribution_df = pd.DataFrame(list(contributions.items()), columns=["Feature", "Contribution"])
+    contribution_df = contribution_df[contribution_df["Contribution"] != 0].sort_values("Contribution")
+    contribution_df["Effect"] = contribution_df["Contribution"].map(
+        lambda value: "Raises Risk" if value > 0 else "Lowers Risk"
+    )
+
+    fig = px.bar(
+        contribution_df,
+        x="Contribution",
+        y="Feature",
+        orientation="h",
+        color="Effect",
+        color_discrete_map={"Raises Risk": "#c90672", "Lowers Risk": "#377eb8"},
+        title=f"Contribution to Cancellation Log-Odds (baseline {intercept:.2f})",
+    )
+
+    fig.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        xaxis_title="Log-Odds Contribution",
+        yaxis_title="Feature",
+    )
+
+    return fig
+
+
 def prepare_metrics_table(metrics):
     return [{"Metric": metric_name, "Value": f"{metric_value:.2f}"}
             for metric_name, metric_value in metrics.items()
@@ -407,4 +583,188 @@ def create_metrics_table(metrics):
         style_data={
             "backgroundColor": "#fafafa",
         },
-    )
\ No newline at end of file
+    )
+
+
+def plot_roc_pr_curves(evaluation):
+    fig = make_subplots(
+        rows=1,
+        cols=2,
+        subplot_titles=(
+            f"ROC Curve (AUC {evaluation['roc_auc']:.3f})",
+            f"Precision-Recall Curve (AP {evaluation['average_precision']:.3f})",
+        ),
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=evaluation["roc"]["fpr"],
+            y=evaluation["roc"]["tpr"],
+            customdata=evaluation["roc"]["thresholds"],
+            mode="lines",
+            name="ROC",
+            line=dict(color="#377eb8", width=2),
+            hovertemplate="FPR: %{x:.2f}<br>TPR: %{y:.2f}<br>Threshold: %{customdata:.2f}<extra></extra>",
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=[0, 1],
+            y=[0, 1],
+            mode="lines",
+            name="Random",
+            line=dict(color="grey", width=1, dash="dot"),
+            hoverinfo="skip",
+        ),
+        row=1,
+        col=1,
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=evaluation["pr"]["recall"],
+            y=evaluation["pr"]["precision"],
+            customdata=evaluation["pr"]["thresholds"],
+            mode="lines",
+            name="Precision-Recall",
+            line=dict(color="#c90672", width=2),
+            hovertemplate="Recall: %{x:.2f}<br>Precision: %{y:.2f}<br>Threshold: %{customdata:.2f}<extra></extra>",
+        ),
+        row=1,
+        col=2,
+    )
+
+    fig.update_xaxes(title_text="False Positive Rate", range=[0, 1], row=1, col=1)
+    fig.update_yaxes(title_text="True Positive Rate", range=[0, 1.02], row=1, col=1)
+    fig.update_xaxes(title_text="Recall", range=[0, 1], row=1, col=2)
+    fig.update_yaxes(title_text="Precision", range=[0, 1.02], row=1, col=2)
+    fig.update_layout(
+        showlegend=False,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+
+    return fig
+
+
+def plot_calibration(evaluation):
+    calibration = evaluation["calibration"]
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Scatter(
+            x=calibration["mean_predicted"],
+            y=calibration["fraction_positive"],
+            customdata=calibration["count"],
+            mode="lines+markers",
+            name="Model",
+            line=dict(color="#377eb8", width=2),
+            hovertemplate="Predicted: %{x:.2f}<br>Observed: %{y:.2f}<br>Bookings: %{customdata}<extra></extra>",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=[0, 1],
+            y=[0, 1],
+            mode="lines",
+            name="Perfectly Calibrated",
+            line=dict(color="grey", width=1, dash="dot"),
+            hoverinfo="skip",
+        )
+    )
+
+    fig.update_layout(
+        title="Calibration",
+        xaxis=dict(title="Mean Predicted Probability", range=[0, 1]),
+        yaxis=dict(title="Observed Cancellation Rate", range=[0, 1]),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+    )
+
+    return fig
+
+
+def create_threshold_table(evaluation):
+    thresholds = evaluation["thresholds"]
+    costs = evaluation["costs"]
+    best = int(thresholds["cost"].argmin())
+
+    threshold_data = [
+        {
+            "Threshold": f"{thresholds['threshold'][i]:.2f}",
+            "Precision": f"{thresholds['precision'][i]:.2f}",
+            "Recall": f"{thresholds['recall'][i]:.2f}",
+            "Flagged": f"{thresholds['flagged_rate'][i] * 100:.1f}%",
+            "Cost per Booking": f"{thresholds['cost'][i]:.3f}",
+        }
+        for i in range(len(thresholds["threshold"]))
+    ]
+
+    return html.Div(
+        children=[
+            html.P(
+                f"Cost of a false alarm: {costs['false_positive']:g}, cost of a missed cancellation: "
+                f"{costs['false_negative']:g}. The lowest-cost threshold is highlighted.",
+                style={"textAlign": "center", "color": "#333"},
+            ),
+            dash_table.DataTable(
+                data=threshold_data,
+                columns=[{"name": name, "id": name} for name in threshold_data[0]],
+                style_table={"width": "60%", "margin": "0 auto", "padding": "10px"},
+                style_header={
+                    "backgroundColor": "#f4f4f4",
+                    "fontWeight": "bold",
+                    "textAlign": "center",
+                },
+                style_cell={
+                    "textAlign": "center",
+                    "padding": "5px",
+                },
+                style_data={
+                    "backgroundColor": "#fafafa",
+                },
+                style_data_conditional=[
+                    {"if": {"row_index": best}, "backgroundColor": "#a6cee3", "fontWeight": "bold"},
+                ],
+            ),
+        ],
+    )
+
+
+def prepare_drift_table(report):
+    return [
+        {
+            "Feature": feature,
+            "Scored Inputs": result["n_observed"],
+            "PSI": "-" if result["psi"] is None else f"{result['psi']:.3f}",
+            "KS": "-" if result["ks"] is None else f"{result['ks']:.3f}",
+            "Status": result["status"],
+        }
+        for feature, result in report["features"].items()
+    ]
+
+
+def create_drift_table():
+    return dash_table.DataTable(
+        id="drift-table",
+        data=[],
+        columns=[{"name": name, "id": name} for name in ["Feature", "Scored Inputs", "PSI", "KS", "Status"]],
+        style_table={"width": "50%", "margin": "0 auto", "padding": "10px"},
+        style_header={
+            "backgroundColor": "#f4f4f4",
+            "fontWeight": "bold",
+            "textAlign": "center",
+        },
+        style_cell={
+            "textAlign": "center",
+            "padding": "10px",
+        },
+        style_data={
+            "backgroundColor": "#fafafa",
+        },
+        style_data_conditional=[
+            {"if": {"filter_query": '{Status} = "Moderate shift"'}, "backgroundColor": "#fff3cd"},
+            {"if": {"filter_query": '{Status} = "Significant shift"'}, "backgroundColor": "#f8d7da"},
+        ],
+    )
@@ -0,0 +1,70 @@
+"""
+Check how long the web app takes to import, which is what every worker pays
+before it can serve its first request.
+
+    python src/import_budget.py --budget 5 --top 15
+
+Runs ``import app`` in a fresh interpreter with ``-X importtime``, prints the
+slowest modules by cumulative import time and exits with status 1 when the
+total is over the budget.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", 5.0))
+
+_PROBE = "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"
+
+
+def parse_importtime(stderr):
+    # Lines look like "import time:   self [us] | cumulative | imported package".
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2]
+        # Nesting is shown by indentation, so top-level imports have the least.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), self_us / 1e6, cumulative_us / 1e6, depth))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Seconds allowed for 'import app'")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules to list")
+    parser.add_argument("--app-dir", default=REPO_DIR, help="Directory holding app.py and data/")
+    args = parser.parse_args()
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=args.app_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr[-2000:])
+        sys.exit(result.returncode)
+
+    total = float(result.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(result.stderr)
+
+    print(f"{'cumulative':>11} {'self':>8}  module")
+    for name, self_s, cumulative_s, depth in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{cumulative_s:>10.3f}s {self_s:>7.3f}s  {'  ' * depth}{name}")
+
+    print(f"\nimport app: {total:.3f}s (budget {args.budget:.3f}s)")
+    if total > args.budget:
+        print("Over budget. Move heavy imports and model loading out of the import path.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Incremental training for the full and form models.
+
+The dataset is streamed in chunks and fitted with SGDClassifier.partial_fit, so
+memory does not depend on the file size. With --warm-start the deployed
+artifact is loaded and only the new bookings are streamed through it.
+
+Run from the src folder:
+    python incremental_model.py --model full
+    python incremental_model.py --model form --data new_bookings.csv --warm-start
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+import drift
+import evaluation
+import features
+import training
+
+# Progressive predictions kept for the evaluation curves (the most recent ones).
+EVALUATION_ROWS = 200_000
+
+
+def new_estimators():
+    scaler = StandardScaler(with_mean=False)
+    clf = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=42)
+    return scaler, clf
+
+
+def warm_estimators(artifact):
+    model = artifact["model"]
+    if "feature_schema" not in artifact or not hasattr(model, "named_steps") or not hasattr(model.named_steps["clf"], "partial_fit"):
+        raise ValueError("the deployed model was not trained incrementally, train it from scratch first")
+    return model.named_steps["scale"], model.named_steps["clf"]
+
+
+def fit_chunks(chunks, schema, scaler, clf, drift_reference=None, drift_columns=None):
+    """
+    Test-then-train over the chunks: every chunk is scored by the current model
+    before it is learned from, which gives out-of-sample metrics for free. Only
+    the last EVALUATION_ROWS scores are kept, so memory stays bounded.
+
+    When ``drift_columns`` is given, their drift reference is built from the
+    first chunk's bins (or continued from ``drift_reference``) and updated with
+    every chunk.
+    """
+    encoder = features.make_encoder(schema)
+    counts = np.zeros((2, 2), dtype=np.int64)
+    y_recent = np.empty(0, dtype=np.int64)
+    proba_recent = np.empty(0, dtype=np.float32)
+    rows = 0
+
+    for chunk in chunks:
+        if drift_columns:
+            if drift_reference is None:
+                drift_reference = drift.build_reference(chunk[drift_columns])
+            else:
+                drift.add_to_reference(drift_reference, chunk[drift_columns])
+
+        X = features.prepare_frame(chunk, schema)
+        y = chunk[features.TARGET].to_numpy()
+        if rows == 0:
+            # Categories are fixed by the schema, so fitting on any chunk gives the same encoder.
+            encoder.fit(X)
+        X = encoder.transform(X)
+
+        if hasattr(clf, "coef_"):
+            y_pred_proba = clf.predict_proba(scaler.transform(X))[:, 1]
+            np.add.at(counts, (y, (y_pred_proba > 0.5).astype(int)), 1)
+            y_recent = np.r_[y_recent, y][-EVALUATION_ROWS:]
+            proba_recent = np.r_[proba_recent, y_pred_proba.astype(np.float32)][-EVALUATION_ROWS:]
+
+        scaler.partial_fit(X)
+        clf.partial_fit(scaler.transform(X), y, classes=[0, 1])
+        rows += len(y)
+
+    return encoder, counts, rows, (y_recent, proba_recent), drift_reference
+
+
+def progressive_metrics(counts):
+    tn, fp, fn, tp = counts.ravel()
+    total = counts.sum()
+    if total == 0:
+        return {}
+    return {
+        "accuracy": float((tp + tn) / total),
+        "precision": float(tp / (tp + fp)) if tp + fp else 0.0,
+        "recall": float(tp / (tp + fn)) if tp + fn else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=sorted(training.ARTIFACTS), default="full")
+    parser.add_argument("--data", default=training.DATA_FILE, help="CSV with the bookings to learn from")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--warm-start", action="store_true", help="continue from the deployed artifact")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows_seen = 0
+    drift_reference = None
+    if args.warm_start:
+        artifact = training.load_artifact(args.model)
+        try:
+            scaler, clf = warm_estimators(artifact)
+        except ValueError as e:
+            parser.error(str(e))
+        schema = artifact["feature_schema"]
+        rows_seen = artifact.get("training_stats", {}).get("rows_seen", 0)
+        drift_reference = artifact.get("drift_reference")
+    else:
+        columns = training.feature_columns(args.model, args.data)
+        schema = training.scan_feature_schema(args.data, columns, args.chunksize)
+        scaler, clf = new_estimators()
+
+    columns = schema["numeric"] + list(schema["categorical"])
+    chunks = training.read_chunks(args.data, columns, args.chunksize)
+    drift_columns = features.FORM_FEATURES if args.model == "form" else None
+    encoder, counts, rows, (y_recent, proba_recent), drift_reference = fit_chunks(
+        chunks, schema, scaler, clf, drift_reference, drift_columns
+    )
+
+    if args.model == "full":
+        model = Pipeline([("encode", encoder), ("scale", scaler), ("clf", clf)])
+    else:
+        # The prediction form already sends the encoded dummy columns.
+        model = Pipeline([("scale", scaler), ("clf", clf)])
+
+    metrics = progressive_metrics(counts)
+    training_stats = {
+        "train_seconds": time.perf_counter() - start,
+        "rows_trained": rows,
+        "rows_seen": rows_seen + rows,
+        "n_features": len(schema["feature_names"]),
+    }
+    extra = {"training_stats": training_stats}
+    if len(y_recent):
+        extra["evaluation"] = evaluation.evaluate_scores(y_recent, proba_recent)
+    if drift_reference:
+        extra["drift_reference"] = drift_reference
+    training.write_artifact(args.model, model, metrics, schema, **extra)
+
+    print(f"Trained on {rows} rows in {training_stats['train_seconds']:.2f}s ({training_stats['rows_seen']} rows in total)")
+    print("Progressive validation metrics:")
+    print(metrics)
+
+
+if __name__ == "__main__":
+    main()
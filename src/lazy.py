@@ -0,0 +1,26 @@
+import threading
+from functools import wraps
+
+
+def once(loader):
+    """
+    Run a zero-argument loader on its first call only and share the result.
+
+    Concurrent first calls wait for a single load. ``loaded()`` tells whether
+    the value exists and ``peek()`` returns it (or None), neither triggering
+    the load.
+    """
+    lock = threading.Lock()
+    result = []
+
+    @wraps(loader)
+    def wrapper():
+        if not result:
+            with lock:
+                if not result:
+                    result.append(loader())
+        return result[0]
+
+    wrapper.loaded = lambda: bool(result)
+    wrapper.peek = lambda: result[0] if result else None
+    return wrapper
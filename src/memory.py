@@ -0,0 +1,154 @@
+import os
+import sys
+import threading
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Reports group by the innermost frame only, and every extra frame slows tracing down.
+TRACEMALLOC_FRAMES = 1
+
+# Statistics kept per grouping between calls. Only the largest locations are
+# kept, so the tracker's own memory stays small next to what it measures.
+TRACKED_STATISTICS = 2000
+
+# The tracker's own statistics are left out of its reports.
+_IGNORED_FILES = {
+    __file__,
+    tracemalloc.__file__,
+    "<frozen importlib._bootstrap>",
+    "<frozen importlib._bootstrap_external>",
+    "<unknown>",
+}
+
+
+def process_memory():
+    """Resident set size of this process and its peak, in bytes (None when unknown)."""
+    rss = peak = None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    except OSError:
+        try:
+            import resource
+        except ImportError:
+            return {"rss_bytes": None, "peak_rss_bytes": None}
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def deep_size(obj, seen=None):
+    """
+    Approximate bytes held by an object and everything it references.
+
+    Frames and arrays report their buffers (object columns included), other
+    objects are walked through their containers and attributes. Shared
+    objects are only counted once.
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + sys.getsizeof(obj) if obj.base is None else sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+class AllocationTracker:
+    """
+    Compares tracemalloc statistics of this process between calls.
+
+    Every call to ``diff`` takes a snapshot and reports what grew since the
+    previous call with the same grouping, so calling it twice some traffic
+    apart shows where memory went in between. The first call lists the
+    largest allocations instead. Only the grouped statistics are kept between
+    calls, never the snapshot itself.
+    """
+
+    def __init__(self):
+        self._previous = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def start(frames=TRACEMALLOC_FRAMES):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def diff(self, group_by="lineno", limit=25):
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+
+        # One report at a time: a snapshot copies every live trace.
+        with self._lock:
+            current = _statistics(group_by)
+            traced, peak = tracemalloc.get_traced_memory()
+            previous = self._previous.get(group_by)
+            self._previous[group_by] = current
+
+        if previous is None:
+            top = [
+                {"location": location, "size_bytes": size, "count": count}
+                for location, (size, count) in list(current.items())[:limit]
+            ]
+        else:
+            top = []
+            for location in current.keys() | previous.keys():
+                size, count = current.get(location, (0, 0))
+                previous_size, previous_count = previous.get(location, (0, 0))
+                top.append({
+                    "location": location,
+                    "size_bytes": size,
+                    "size_diff_bytes": size - previous_size,
+                    "count": count,
+                    "count_diff": count - previous_count,
+                })
+            # Same order as Snapshot.compare_to: biggest change first.
+            top.sort(key=lambda stat: (abs(stat["size_diff_bytes"]), stat["size_bytes"]), reverse=True)
+            top = top[:limit]
+
+        return {
+            "tracing": True,
+            "compared_to_previous": previous is not None,
+            "group_by": group_by,
+            "traced_bytes": traced,
+            "traced_peak_bytes": peak,
+            "top": top,
+        }
+
+
+def _statistics(group_by):
+    """Size and count of the largest allocation sites, largest first."""
+    statistics = {}
+    for stat in tracemalloc.take_snapshot().statistics(group_by):
+        frame = stat.traceback[0]
+        if frame.filename in _IGNORED_FILES:
+            continue
+        statistics[_location(frame, group_by)] = (stat.size, stat.count)
+        if len(statistics) == TRACKED_STATISTICS:
+            break
+    return statistics
+
+
+def _location(frame, group_by):
+    filename = os.path.relpath(frame.filename) if frame.filename.startswith(os.getcwd()) else frame.filename
+    return filename if group_by == "filename" else f"{filename}:{frame.lineno}"
@@ -1,27 +1,40 @@
+import time
+import tracemalloc
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, classification_report
-from sklearn.preprocessing import StandardScaler
 import pickle
 import graphics
+import features
+import evaluation
 
-file = "C:\\Users\\arias\\OneDrive - Universidad Pontificia Comillas\\AÑO 5\\Visualización\\Hotel Cancellation\\data\\clean_hotel_bookings.csv" 
+file = "C:\\Users\\arias\\OneDrive - Universidad Pontificia Comillas\\AÑO 5\\Visualización\\Hotel Cancellation\\data\\clean_hotel_bookings.csv"
 
 df = pd.read_csv(file)
-    
-X = df.drop(columns=['is_canceled'])
-y = df['is_canceled']
 
-X = pd.get_dummies(X)
+X = df.drop(columns=[features.TARGET])
+y = df[features.TARGET]
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+feature_schema = features.build_feature_schema(X)
+X = features.prepare_frame(X, feature_schema)
 
-X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, test_size=0.3, random_state=42, stratify=y)
+X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
 
-model = LogisticRegression(max_iter=500, random_state=42)
+# lbfgs fits the sparse one-hot matrix as is, so nothing is densified.
+MAX_ITER = 1000
+model = features.make_pipeline(
+    feature_schema,
+    LogisticRegression(max_iter=MAX_ITER, random_state=42),
+)
+
+tracemalloc.start()
+start = time.perf_counter()
 model.fit(X_train, y_train)
+train_seconds = time.perf_counter() - start
+_, peak_memory = tracemalloc.get_traced_memory()
+tracemalloc.stop()
+
 y_pred = model.predict(X_test)
 y_pred_proba = model.predict_proba(X_test)[:, 1]
 metrics = {
@@ -30,7 +43,15 @@ metrics = {
     "recall": recall_score(y_test, y_pred),
     "classification_report": classification_report(y_test, y_pred)
 }
-feature_importances = dict(zip(X.columns, abs(model.coef_[0])))
+model_evaluation = evaluation.evaluate_scores(y_test, y_pred_proba)
+training_stats = {
+    "train_seconds": train_seconds,
+    "peak_memory_mb": peak_memory / 2**20,
+    "n_features": len(feature_schema["feature_names"]),
+    "n_iter": int(model.named_steps["clf"].n_iter_[0]),
+    "converged": bool(model.named_steps["clf"].n_iter_[0] < MAX_ITER),
+}
+feature_importances = dict(zip(feature_schema["feature_names"], abs(model.named_steps["clf"].coef_[0])))
 
 with open("model.pkl", "wb") as f:
     pickle.dump(
@@ -38,6 +59,9 @@ with open("model.pkl", "wb") as f:
             "model": model,
             "metrics": metrics,
             "feature_importances": feature_importances,
+            "feature_schema": feature_schema,
+            "evaluation": model_evaluation,
+            "training_stats": training_stats,
         },
         f,
     )
@@ -45,6 +69,12 @@ with open("model.pkl", "wb") as f:
 with open("feature_importances.pkl", "wb") as f:
     pickle.dump(feature_importances, f)
 
+print("Metrics:")
+print(metrics["classification_report"])
+print(f"Train time: {train_seconds:.2f}s")
+print(f"Peak memory during fit: {training_stats['peak_memory_mb']:.1f} MB")
+print(f"Encoded features: {training_stats['n_features']}")
+print(f"Solver iterations: {training_stats['n_iter']} ({'converged' if training_stats['converged'] else 'did not converge'})")
+
 feature_importance_graph = graphics.plot_feature_importances(feature_importances)
 feature_importance_graph.write_html("feature_importance_graph.html")
-
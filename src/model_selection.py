@@ -0,0 +1,227 @@
+"""
+Stratified k-fold model selection for the full and form models.
+
+Every (hyperparameters, fold) pair is fitted in a process pool. The encoded and
+scaled design matrix is cached on disk, keyed on the data file and the feature
+set, so repeated runs skip preprocessing. The best candidate is refitted on all
+rows and written to the artifact the app loads, together with the per-fold
+metrics and timings of every candidate.
+
+Run from the src folder:
+    python model_selection.py --model full --folds 5
+"""
+import argparse
+import hashlib
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+import drift
+import evaluation
+import features
+import training
+
+CACHE_DIR = os.path.join(training.SRC_DIR, "cache")
+# Bump when the cached contents change so stale entries are not reused.
+CACHE_VERSION = 2
+
+# lbfgs converges in a few dozen iterations on the scaled design matrix;
+# this is only a ceiling so a bad candidate cannot run away.
+MAX_ITER = 1000
+
+PARAM_GRID = {
+    "C": [0.01, 0.1, 1.0, 10.0],
+    "class_weight": [None, "balanced"],
+}
+
+SELECTION_METRIC = "roc_auc"
+
+
+def cache_key(file, kind):
+    stat = os.stat(file)
+    token = f"{os.path.abspath(file)}|{stat.st_size}|{stat.st_mtime_ns}|{kind}|{CACHE_VERSION}"
+    return hashlib.sha1(token.encode()).hexdigest()[:16]
+
+
+def load_design_matrix(file, kind, cache_dir):
+    """
+    Return the paths of the cached matrix and labels, the fitted preprocessing
+    and, for the form model, the drift reference of its inputs.
+
+    On a cache miss the data is read, encoded with the sparse one-hot encoder,
+    scaled, and saved as .npz/.npy next to the pickled preprocessing pipeline.
+    """
+    base = os.path.join(cache_dir, f"{kind}-{cache_key(file, kind)}")
+    paths = (f"{base}.X.npz", f"{base}.y.npy")
+
+    if all(os.path.exists(path) for path in paths + (f"{base}.prep.pkl",)):
+        with open(f"{base}.prep.pkl", "rb") as f:
+            schema, preprocessing, drift_reference = pickle.load(f)
+        return paths, schema, preprocessing, drift_reference, True
+
+    df = pd.read_csv(file, usecols=training.feature_columns(kind, file) + [features.TARGET])
+    X = df.drop(columns=[features.TARGET])
+    y = df[features.TARGET].to_numpy()
+
+    schema = features.build_feature_schema(X)
+    drift_reference = drift.build_reference(X) if kind == "form" else None
+    preprocessing = Pipeline([
+        ("encode", features.make_encoder(schema)),
+        ("scale", StandardScaler(with_mean=False)),
+    ])
+    X = sparse.csr_matrix(preprocessing.fit_transform(features.prepare_frame(X, schema)))
+
+    os.makedirs(cache_dir, exist_ok=True)
+    sparse.save_npz(paths[0], X)
+    np.save(paths[1], y)
+    with open(f"{base}.prep.pkl", "wb") as f:
+        pickle.dump((schema, preprocessing, drift_reference), f)
+
+    return paths, schema, preprocessing, drift_reference, False
+
+
+# Per-worker state, loaded once by the pool initializer.
+_X = _y = _folds = None
+
+
+def _init_worker(paths, n_folds):
+    global _X, _y, _folds
+    _X = sparse.load_npz(paths[0]).tocsr()
+    _y = np.load(paths[1])
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    _folds = list(splitter.split(np.zeros(len(_y)), _y))
+
+
+def make_classifier(params):
+    return LogisticRegression(max_iter=MAX_ITER, random_state=42, **params)
+
+
+def _fit_fold(candidate, params, fold):
+    train_index, test_index = _folds[fold]
+    clf = make_classifier(params)
+
+    start = time.perf_counter()
+    clf.fit(_X[train_index], _y[train_index])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred_proba = clf.predict_proba(_X[test_index])[:, 1]
+    score_seconds = time.perf_counter() - start
+
+    y_test = _y[test_index]
+    y_pred = (y_pred_proba > 0.5).astype(int)
+    return candidate, {
+        "fold": fold,
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred),
+        "roc_auc": roc_auc_score(y_test, y_pred_proba),
+        "fit_seconds": fit_seconds,
+        "score_seconds": score_seconds,
+        "n_iter": int(clf.n_iter_[0]),
+        "converged": bool(clf.n_iter_[0] < MAX_ITER),
+    }, y_pred_proba
+
+
+def cross_validate(paths, candidates, n_folds, n_jobs):
+    """
+    Returns the per-candidate fold results and the out-of-fold probabilities of
+    every candidate, used to build the evaluation curves of the selected one.
+    """
+    results = [{"params": params, "folds": []} for params in candidates]
+    y = np.load(paths[1])
+    out_of_fold = np.zeros((len(candidates), len(y)), dtype=np.float32)
+    # Same splitter and seed as the workers, so the test indices line up.
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=42)
+    folds = list(splitter.split(np.zeros(len(y)), y))
+
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(paths, n_folds)) as pool:
+        futures = [
+            pool.submit(_fit_fold, candidate, params, fold)
+            for candidate, params in enumerate(candidates)
+            for fold in range(n_folds)
+        ]
+        for future in futures:
+            candidate, fold_result, y_pred_proba = future.result()
+            results[candidate]["folds"].append(fold_result)
+            out_of_fold[candidate, folds[fold_result["fold"]][1]] = y_pred_proba
+
+    for result in results:
+        result["mean"] = {
+            key: float(np.mean([fold[key] for fold in result["folds"]]))
+            for key in result["folds"][0] if key not in ("fold", "converged")
+        }
+        result["converged"] = all(fold["converged"] for fold in result["folds"])
+    return results, out_of_fold, y
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", choices=sorted(training.ARTIFACTS), default="full")
+    parser.add_argument("--data", default=training.DATA_FILE)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths, schema, preprocessing, drift_reference, cached = load_design_matrix(args.data, args.model, args.cache_dir)
+    preprocess_seconds = time.perf_counter() - start
+    print(f"Design matrix {'loaded from cache' if cached else 'built'} in {preprocess_seconds:.2f}s")
+
+    candidates = list(ParameterGrid(PARAM_GRID))
+    start = time.perf_counter()
+    cv_results, out_of_fold, y = cross_validate(paths, candidates, args.folds, args.jobs)
+    cv_seconds = time.perf_counter() - start
+
+    for result in cv_results:
+        converged = "" if result["converged"] else " (did not converge on every fold)"
+        print(result["params"], {key: round(value, 4) for key, value in result["mean"].items()}, converged)
+
+    best_index = max(range(len(cv_results)), key=lambda i: cv_results[i]["mean"][SELECTION_METRIC])
+    best = cv_results[best_index]
+    print(f"Best by {SELECTION_METRIC}: {best['params']}")
+
+    start = time.perf_counter()
+    clf = make_classifier(best["params"]).fit(sparse.load_npz(paths[0]), y)
+    refit_seconds = time.perf_counter() - start
+
+    steps = preprocessing.steps if args.model == "full" else preprocessing.steps[1:]
+    model = Pipeline(steps + [("clf", clf)])
+
+    metrics = {key: best["mean"][key] for key in ("accuracy", "precision", "recall", "roc_auc")}
+    extra = {"drift_reference": drift_reference} if drift_reference else {}
+    training.write_artifact(
+        args.model,
+        model,
+        metrics,
+        schema,
+        best_params=best["params"],
+        cv_results=cv_results,
+        evaluation=evaluation.evaluate_scores(y, out_of_fold[best_index]),
+        training_stats={
+            "preprocess_seconds": preprocess_seconds,
+            "preprocess_cached": cached,
+            "cv_seconds": cv_seconds,
+            "refit_seconds": refit_seconds,
+            "n_folds": args.folds,
+            "n_jobs": args.jobs,
+            "n_features": len(schema["feature_names"]),
+            "refit_n_iter": int(clf.n_iter_[0]),
+            "refit_converged": bool(clf.n_iter_[0] < MAX_ITER),
+        },
+        **extra,
+    )
+    print(f"Cross-validation took {cv_seconds:.2f}s on {args.jobs} processes, refit {refit_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
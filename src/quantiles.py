@@ -0,0 +1,112 @@
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+# t-digest compression: a digest keeps about COMPRESSION / 2 centroids.
+COMPRESSION = 100
+
+PERCENTILES = (0.1, 0.5, 0.9)
+
+
+class Digest(NamedTuple):
+    means: np.ndarray
+    weights: np.ndarray
+    minimum: float
+    maximum: float
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+
+def _scale(q, compression):
+    # k1 scale function: centroids are small near the tails and large in the middle.
+    return compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+
+
+def _compress(means, weights, minimum, maximum, compression):
+    order = np.argsort(means, kind="stable")
+    means, weights = means[order], weights[order]
+
+    # Each centroid covers at most one unit of the scale function. Bucketing
+    # the centroids by the scale of their mid quantile does this in one pass.
+    total = weights.sum()
+    mid_quantiles = (np.cumsum(weights) - weights / 2) / total
+    buckets = np.floor(_scale(mid_quantiles, compression) - _scale(0.0, compression)).astype(np.int64)
+    _, buckets = np.unique(buckets, return_inverse=True)
+
+    merged_weights = np.bincount(buckets, weights=weights)
+    merged_means = np.bincount(buckets, weights=means * weights) / merged_weights
+    return Digest(merged_means, merged_weights, minimum, maximum)
+
+
+def sketch(values, compression=COMPRESSION):
+    """t-digest of a batch of values (NaNs are ignored), or None when there are none."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    return _compress(values, np.ones(len(values)), float(values.min()), float(values.max()), compression)
+
+
+def merge(digests, compression=COMPRESSION):
+    """
+    Combine digests into one, as if all their values had been sketched together.
+
+    Merging is how partitions are combined for a range, and how new values are
+    added to an existing digest: ``merge([digest, sketch(new_values)])``.
+    """
+    digests = [digest for digest in digests if digest is not None]
+    if not digests:
+        return None
+    if len(digests) == 1:
+        return digests[0]
+    return _compress(
+        np.concatenate([digest.means for digest in digests]),
+        np.concatenate([digest.weights for digest in digests]),
+        min(digest.minimum for digest in digests),
+        max(digest.maximum for digest in digests),
+        compression,
+    )
+
+
+def quantiles(digest, qs=PERCENTILES):
+    """Estimated quantiles, interpolated between centroid midpoints and the extremes."""
+    cumulative = np.cumsum(digest.weights) - digest.weights / 2
+    positions = np.r_[0.0, cumulative, digest.count]
+    values = np.r_[digest.minimum, digest.means, digest.maximum]
+    return np.interp(np.asarray(qs) * digest.count, positions, values)
+
+
+def build_sketches(df, column, compression=COMPRESSION):
+    """One digest of ``column`` per arrival month and hotel, sorted by month."""
+    return {
+        (month, hotel): sketch(values, compression)
+        for (month, hotel), values in df.groupby(["arrival_month", "hotel"], sort=True)[column]
+    }
+
+
+def percentile_bands(sketches, start, end, hotel="Both", qs=PERCENTILES):
+    """
+    Percentiles per month and hotel for arrival months in [start, end], plus the
+    percentiles of the whole range per hotel, from merging the monthly digests.
+    """
+    hotels = sorted({h for _, h in sketches}) if hotel == "Both" else [hotel]
+    columns = [f"p{round(q * 100)}" for q in qs]
+
+    monthly, overall = [], []
+    for h in hotels:
+        selected = [
+            (month, digest) for (month, digest_hotel), digest in sketches.items()
+            if digest_hotel == h and start <= month <= end and digest is not None
+        ]
+        for month, digest in selected:
+            monthly.append([month.to_timestamp(), h, *quantiles(digest, qs)])
+        combined = merge([digest for _, digest in selected])
+        if combined is not None:
+            overall.append([h, combined.count, *quantiles(combined, qs)])
+
+    return (
+        pd.DataFrame(monthly, columns=["arrival_month", "hotel", *columns]).sort_values(["hotel", "arrival_month"]),
+        pd.DataFrame(overall, columns=["hotel", "count", *columns]),
+    )
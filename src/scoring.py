@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import pandas as pd
+from src.features import FORM_FEATURES
+
+
+# Axes of the what-if probability surface.
+WHAT_IF_ADR = np.arange(0, 305, 5)
+WHAT_IF_PREVIOUS_CANCELLATIONS = np.arange(0, 11)
+
+
+def _design_frame(feature_names, numeric, deposit_types):
+    """Dummy-column frame from numeric feature arrays and one deposit dummy name per row."""
+    columns = {name: i for i, name in enumerate(feature_names)}
+    X = np.zeros((len(deposit_types), len(feature_names)))
+
+    for feature, values in numeric.items():
+        if feature in columns:
+            X[:, columns[feature]] = values
+
+    for i, deposit_type in enumerate(deposit_types):
+        column = columns.get(deposit_type)
+        if column is not None:
+            X[i, column] = 1
+
+    return pd.DataFrame(X, columns=feature_names)
+
+
+def has_input_scaling(model):
+    """
+    Whether a form model scales its own inputs. The first form_model.pkl was a
+    bare classifier fitted on standardized values, which gives meaningless
+    probabilities for raw form values.
+    """
+    return hasattr(model, "steps")
+
+
+def _model_input(model, X):
+    # Models fitted on unnamed matrices (the chunked and cross-validated form
+    # pipelines) get an array, so sklearn does not warn about feature names.
+    return X if hasattr(model, "feature_names_in_") else X.to_numpy()
+
+
+def form_frame(rows, feature_names):
+    """
+    Encode prediction form rows into the dummy columns the form model expects.
+
+    ``rows`` are dicts keyed by FORM_FEATURES, where ``deposit_type`` holds the
+    dummy column name selected in the form (e.g. "deposit_type_Non Refund").
+    """
+    numeric = {
+        feature: [row[feature] for row in rows] for feature in FORM_FEATURES if feature != "deposit_type"
+    }
+    return _design_frame(feature_names, numeric, [row["deposit_type"] for row in rows])
+
+
+def what_if_surface(model, feature_names, deposit_type, parking,
+                    adr_values=WHAT_IF_ADR, previous_values=WHAT_IF_PREVIOUS_CANCELLATIONS):
+    """
+    Cancellation probability over an ADR x previous cancellations grid, scored in one call.
+
+    Returns an array of shape (len(previous_values), len(adr_values)).
+    """
+    adr, previous = np.meshgrid(adr_values, previous_values)
+    numeric = {
+        "required_car_parking_spaces": np.full(adr.size, parking),
+        "adr": adr.ravel(),
+        "previous_cancellations": previous.ravel(),
+    }
+    X = _model_input(model, _design_frame(feature_names, numeric, [deposit_type] * adr.size))
+    return model.predict_proba(X)[:, 1].reshape(adr.shape)
+
+
+def linear_contributions(model, X):
+    """
+    Per-feature contribution to the log-odds of a linear model, for a whole batch.
+
+    Each contribution is the coefficient times the value the classifier sees,
+    i.e. after the scaling steps when ``model`` is a pipeline. A row of
+    contributions plus the intercept adds up to the decision function.
+    Returns the (n_rows, n_features) contributions and the intercept.
+    """
+    from scipy import sparse
+
+    if hasattr(model, "steps"):
+        X = model[:-1].transform(X)
+        model = model.steps[-1][1]
+
+    coefficients = model.coef_[0]
+    if sparse.issparse(X):
+        contributions = sparse.csr_matrix(X.multiply(coefficients))
+    else:
+        contributions = np.asarray(X, dtype=float) * coefficients
+    return contributions, float(model.intercept_[0])
+
+
+def score_rows(model, feature_names, rows):
+    """
+    Score a batch with a single probability pass.
+
+    Returns one dict per row with the prediction, the cancellation probability
+    and the per-feature log-odds contributions.
+    """
+    X = _model_input(model, form_frame(rows, feature_names))
+    probabilities = model.predict_proba(X)[:, 1]
+    contributions, intercept = linear_contributions(model, X)
+    if hasattr(contributions, "toarray"):
+        # Sparse for encoder pipelines; batches are at most a few hundred rows.
+        contributions = contributions.toarray()
+
+    return [
+        {
+            "prediction": int(probability > 0.5),
+            "probability": float(probability),
+            "contributions": dict(zip(feature_names, row.tolist())),
+            "intercept": intercept,
+        }
+        for probability, row in zip(probabilities, contributions)
+    ]
+
+
+class MicroBatcher:
+    """
+    Collect concurrent single-row requests and score them as one batch.
+
+    The first request opens a window of ``window_ms``; everything submitted
+    before it closes (up to ``max_batch_size`` rows) is passed to
+    ``score_batch`` in one call. The worker thread starts on first use, so it
+    is created inside each gunicorn worker rather than in the master.
+    """
+
+    def __init__(self, score_batch, window_ms=5, max_batch_size=256):
+        self._score_batch = score_batch
+        self._window = window_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, row):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((row, future))
+        return future
+
+    def score(self, row, timeout=None):
+        return self.submit(row).result(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            # Also restarts a worker that died, so later requests are still served.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self._window
+        while len(batch) < self._max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                results = list(self._score_batch([row for row, _ in batch]))
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                if not isinstance(e, Exception):
+                    raise
+                continue
+
+            for i, (_, future) in enumerate(batch):
+                if i < len(results):
+                    future.set_result(results[i])
+                else:
+                    future.set_exception(
+                        RuntimeError(f"score_batch returned {len(results)} results for {len(batch)} rows")
+                    )
@@ -0,0 +1,47 @@
+import pandas as pd
+
+# Segments with fewer bookings in the selected range are left out of rankings,
+# since their cancellation rates are mostly noise.
+MIN_SEGMENT_BOOKINGS = 30
+
+SUM_COLUMNS = ["bookings", "cancellations", "adr_sum", "lead_time_sum"]
+
+
+def slice_months(table, start, end, hotel="Both"):
+    """Rows of a segment table for arrival months in [start, end], found by binary search."""
+    lo = table.index.searchsorted(start, side="left")
+    hi = table.index.searchsorted(end, side="right")
+    rows = table.iloc[lo:hi]
+    if hotel != "Both":
+        rows = rows[rows["hotel"] == hotel]
+    return rows
+
+
+def _with_rates(totals):
+    totals["cancellation_rate"] = totals["cancellations"] / totals["bookings"]
+    totals["average_adr"] = totals["adr_sum"] / totals["bookings"]
+    totals["average_lead_time"] = totals["lead_time_sum"] / totals["bookings"]
+    return totals.drop(columns=["adr_sum", "lead_time_sum"])
+
+
+def segment_summary(table, start, end, hotel="Both"):
+    """Bookings, cancellations, cancellation rate and averages per segment over a range."""
+    rows = slice_months(table, start, end, hotel)
+    totals = rows.groupby("segment", observed=True)[SUM_COLUMNS].sum()
+    return _with_rates(totals[totals["bookings"] > 0]).reset_index()
+
+
+def top_segments(summary, n=10, min_bookings=MIN_SEGMENT_BOOKINGS):
+    """The ``n`` segments with the highest cancellation rate, ties broken by volume."""
+    eligible = summary[summary["bookings"] >= min_bookings]
+    return eligible.sort_values(["cancellation_rate", "bookings"], ascending=False).head(n)
+
+
+def segment_trend(table, segment, start, end, hotel="Both"):
+    """Monthly bookings and cancellation rate of one segment, per hotel."""
+    rows = slice_months(table, start, end, hotel)
+    rows = rows[rows["segment"] == segment]
+    totals = rows.groupby([rows.index, "hotel"], observed=True)[SUM_COLUMNS].sum()
+    trend = _with_rates(totals).reset_index()
+    trend["arrival_month"] = pd.PeriodIndex(trend["arrival_month"], freq="M").to_timestamp()
+    return trend
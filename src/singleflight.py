@@ -0,0 +1,76 @@
+import json
+import threading
+from functools import wraps
+from plotly.io.json import to_json_plotly
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates identical computations that are running at the same time.
+
+    The first caller for a key computes and serializes the result; callers
+    arriving while it runs wait and decode the same JSON, so each gets its own
+    copy. The key is forgotten as soon as the computation finishes, so later
+    calls always recompute: nothing is cached.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.computed = 0
+        self.shared = 0
+
+    def do(self, key, compute):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.computed += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                # Serialized the way Dash does it, so figures and numpy arrays survive.
+                call.result = to_json_plotly(compute())
+            except BaseException as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return json.loads(call.result)
+
+    def coalesce(self, name):
+        """
+        Decorator for a Dash callback keyed on ``name`` and its arguments.
+
+        Only for callbacks whose output depends on their arguments alone (not on
+        callback_context or anything else that differs between requests).
+        """
+        def decorator(callback):
+            @wraps(callback)
+            def wrapper(*args):
+                key = (name, json.dumps(args, sort_keys=True, default=str))
+                return self.do(key, lambda: callback(*args))
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "computed": self.computed, "shared": self.shared}
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Finest resolution first, so the first level that fits the budget wins.
+RESOLUTIONS = {"D": "Daily", "W": "Weekly", "M": "Monthly"}
+
+# Maximum number of points sent per hotel line.
+POINT_BUDGET = 400
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Returns the indices of the points to keep, always including the first and
+    the last one, so the visual shape of the series is preserved.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (threshold - 2)
+
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int(np.floor((i + 1) * every)) + 1
+        next_end = min(int(np.floor((i + 2) * every)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(np.floor(i * every)) + 1
+        end = next_start
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+
+    indices[-1] = n - 1
+    return indices
+
+
+def slice_range(rollup, start, end):
+    """Buckets of a rollup overlapping [start, end], found by binary search on the index."""
+    lo = max(rollup.index.searchsorted(start, side="right") - 1, 0)
+    hi = rollup.index.searchsorted(end, side="right")
+    return rollup.iloc[lo:hi]
+
+
+def select_resolution(pyramid, start, end, resolution="auto", budget=POINT_BUDGET):
+    """
+    Pick the rollup to plot for a date range.
+
+    In ``"auto"`` mode the finest resolution with at most ``budget`` buckets is
+    used. A fixed resolution is honoured as is and downsampled later if needed.
+    """
+    if resolution != "auto":
+        return resolution, slice_range(pyramid[resolution], start, end)
+
+    for freq in RESOLUTIONS:
+        sliced = slice_range(pyramid[freq], start, end)
+        if len(sliced) <= budget:
+            return freq, sliced
+    return freq, sliced
+
+
+def reservations_for_range(pyramid, start, end, resolution="auto", budget=POINT_BUDGET):
+    """
+    Long-format reservation counts for the range, bounded to ``budget`` points per hotel.
+
+    Returns the frame and the label of the resolution used.
+    """
+    freq, sliced = select_resolution(pyramid, start, end, resolution, budget)
+
+    x = sliced.index.asi8
+    frames = []
+    for hotel in sliced.columns:
+        keep = lttb(x, sliced[hotel].to_numpy(), budget)
+        frames.append(pd.DataFrame({
+            "arrival_date": sliced.index[keep],
+            "hotel": hotel,
+            "reservations": sliced[hotel].to_numpy()[keep],
+        }))
+
+    if frames:
+        reservations = pd.concat(frames, ignore_index=True)
+    else:
+        reservations = pd.DataFrame(columns=["arrival_date", "hotel", "reservations"])
+
+    return reservations, RESOLUTIONS[freq]
@@ -0,0 +1,81 @@
+import os
+import pickle
+import pandas as pd
+import features
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_FILE = os.path.join(SRC_DIR, "..", "data", "clean_hotel_bookings.csv")
+
+# Artifacts loaded by etl.load_full_model_data and etl.load_form_model_data.
+ARTIFACTS = {
+    "full": os.path.join(SRC_DIR, "model.pkl"),
+    "form": os.path.join(SRC_DIR, "form_model.pkl"),
+}
+FEATURE_IMPORTANCES_FILE = os.path.join(SRC_DIR, "feature_importances.pkl")
+
+
+def feature_columns(kind, file):
+    if kind == "form":
+        return list(features.FORM_FEATURES)
+    header = pd.read_csv(file, nrows=0).columns
+    return [col for col in header if col != features.TARGET]
+
+
+def read_chunks(file, columns, chunksize):
+    return pd.read_csv(file, usecols=columns + [features.TARGET], chunksize=chunksize)
+
+
+def scan_feature_schema(file, columns, chunksize):
+    """
+    Build the feature schema in one streaming pass over the file.
+
+    A column is numeric only if it is numeric in every chunk; categories are the
+    union of the values seen in all chunks. Values are recorded as strings for
+    every column and chunk, because a column that turns out to be categorical
+    may still have parsed as numbers in some chunks.
+    """
+    numeric = set(columns)
+    values = {col: set() for col in columns}
+    for chunk in read_chunks(file, columns, chunksize):
+        chunk = chunk[columns]
+        numeric &= set(chunk.select_dtypes(include="number").columns)
+        for col in columns:
+            # Stringified like prepare_frame does when the chunk is encoded.
+            values[col].update(chunk[col].dropna().astype(str).unique())
+
+    schema = {
+        "numeric": [col for col in columns if col in numeric],
+        "categorical": {
+            col: sorted(values[col]) for col in columns if col not in numeric
+        },
+    }
+    schema["feature_names"] = features.encoded_feature_names(schema)
+    return schema
+
+
+def load_artifact(kind):
+    with open(ARTIFACTS[kind], "rb") as f:
+        return pickle.load(f)
+
+
+def write_artifact(kind, model, metrics, feature_schema, **extra):
+    """
+    Write a model artifact in the layout the app expects.
+
+    The full model also refreshes feature_importances.pkl. The form model is
+    stored with its ``feature_names``, the dummy columns the prediction form sends.
+    """
+    artifact = {"model": model, "metrics": metrics, "feature_schema": feature_schema, **extra}
+
+    if kind == "full":
+        coefficients = model.named_steps["clf"].coef_[0]
+        artifact["feature_importances"] = dict(zip(feature_schema["feature_names"], abs(coefficients)))
+        with open(FEATURE_IMPORTANCES_FILE, "wb") as f:
+            pickle.dump(artifact["feature_importances"], f)
+    else:
+        artifact["feature_names"] = feature_schema["feature_names"]
+
+    with open(ARTIFACTS[kind], "wb") as f:
+        pickle.dump(artifact, f)
+
+    return artifact